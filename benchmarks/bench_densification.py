@@ -0,0 +1,102 @@
+"""Benchmark of the polygons densification used in the uniform and greedily modes.
+
+Compares `add_points_to_obj` and `edge_points` with the previous point by point
+implementations and checks that the results are identical.
+
+Run from the repository root:
+    python benchmarks/bench_densification.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from interpolation.utils import add_points_to_obj, edge_points
+
+
+def reference_add_points_to_obj(obj: np.ndarray, total_points: int) -> np.ndarray:
+    """Previous implementation of `add_points_to_obj`."""
+    per_edge = total_points // len(obj)
+    start_point = list(obj[0])
+    new_obj = [start_point]
+
+    for point in list(np.roll(obj, -1, axis=0)):
+        dx = (point[0] - start_point[0]) / (per_edge + 1)
+        dy = (point[1] - start_point[1]) / (per_edge + 1)
+        for step in range(1, per_edge + 1):
+            nx = start_point[0] + step * dx
+            ny = start_point[1] + step * dy
+            new_obj.append([nx, ny])
+        new_obj.append(point)
+        start_point = point
+
+    return np.array(new_obj[:-1])
+
+
+def reference_edge_points(point, next_point, num):
+    """Previous implementation of `uniform_points` from `add_points_to_obj_greedily`."""
+    dx = (next_point[0] - point[0]) / (num + 1)
+    dy = (next_point[1] - point[1]) / (num + 1)
+    points = []
+
+    for i in range(1, num + 1):
+        nx = point[0] + dx * i
+        ny = point[1] + dy * i
+        points.append([nx, ny])
+
+    return np.array(points)
+
+
+def make_polygon(vertices: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    angles = np.sort(rng.random(vertices)) * 2 * np.pi
+    return np.stack((500 + 200 * np.cos(angles), 500 + 200 * np.sin(angles)), axis=1).astype(int)
+
+
+def check_parity(cases: int = 200) -> bool:
+    rng = np.random.default_rng(1)
+    for _ in range(cases):
+        obj = make_polygon(int(rng.integers(3, 50)), int(rng.integers(1000)))
+        total_points = len(obj) * int(rng.integers(1, 20))
+        if not np.array_equal(
+            reference_add_points_to_obj(obj, total_points), add_points_to_obj(obj, total_points)
+        ):
+            return False
+
+        num = int(rng.integers(1, 50))
+        if not np.array_equal(reference_edge_points(obj[0], obj[1], num), edge_points(obj[0], obj[1], num)):
+            return False
+    return True
+
+
+def bench(name, reference, current, repeat=5):
+    ref_time = min(timeit.repeat(reference, number=1, repeat=repeat))
+    cur_time = min(timeit.repeat(current, number=1, repeat=repeat))
+    print(f"{name:<40} {ref_time:>13.5f} {cur_time:>11.5f} {ref_time / cur_time:>7.0f}x")
+
+
+def main():
+    print(f"identical results: {check_parity()}")
+    print(f"{'case':<40} {'reference, s':>13} {'current, s':>11} {'speedup':>8}")
+    for vertices, per_edge in ((97, 100), (101, 96), (500, 20)):
+        obj = make_polygon(vertices)
+        total_points = vertices * per_edge
+        bench(
+            f"add_points_to_obj {vertices} x {per_edge}",
+            lambda: reference_add_points_to_obj(obj, total_points),
+            lambda: add_points_to_obj(obj, total_points),
+        )
+    for num in (10, 100, 1000):
+        obj = make_polygon(3)
+        bench(
+            f"edge_points {num}",
+            lambda: reference_edge_points(obj[0], obj[1], num),
+            lambda: edge_points(obj[0], obj[1], num),
+        )
+
+
+if __name__ == "__main__":
+    main()
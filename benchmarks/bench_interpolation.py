@@ -0,0 +1,74 @@
+"""Benchmark of every interpolation model on synthetic objects.
+
+Interpolates all objects of a scenario with each model, without the tracker
+and the api, to the numpy coordinates and to the json the tracker uploads.
+
+Run from the repository root:
+    python benchmarks/bench_interpolation.py [repeat]
+"""
+import os
+import sys
+import timeit
+
+import supervisely_lib as sly
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from interpolation import (
+    LinearPointInterpolation,
+    LinearPolygonInterpolation,
+    LinearRectangleInterpolation,
+    Output,
+)
+from synthetic import Scenario, make_keyframes
+
+
+GEOMETRIES = {
+    "point": sly.Point,
+    "rectangle": sly.Rectangle,
+    "polygon": sly.Polygon,
+}
+
+CASES = [
+    ("linear point", LinearPointInterpolation, Scenario("point", objects=50, keyframes=10, gap=30)),
+    ("linear rectangle", LinearRectangleInterpolation, Scenario("rectangle", objects=50, keyframes=10, gap=30)),
+    ("polygon uniform", lambda: LinearPolygonInterpolation("uniform"), Scenario("polygon", vertices=20)),
+    ("polygon greedily", lambda: LinearPolygonInterpolation("greedily"), Scenario("polygon", vertices=20)),
+    ("polygon greedily", lambda: LinearPolygonInterpolation("greedily"), Scenario("polygon", vertices=200)),
+    ("polygon resampled", lambda: LinearPolygonInterpolation("resampled", 100), Scenario("polygon", vertices=200)),
+    ("polygon resampled", lambda: LinearPolygonInterpolation("resampled", 100), Scenario("polygon", gap=300)),
+]
+
+
+def load_objects(scenario: Scenario):
+    geometry = GEOMETRIES[scenario.geometry_type]
+    return [
+        (frames, [geometry.from_json(geometry_json) for geometry_json in geometries])
+        for frames, geometries in make_keyframes(scenario).values()
+    ]
+
+
+def interpolate(model, objects, output: Output) -> int:
+    created = 0
+    for frames, figures in objects:
+        all_frames = list(range(frames[0], frames[-1] + 1))
+        for _ in model.interpolate(frames, figures, all_frames, output=output):
+            created += 1
+    return created
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'model':<20} {'scenario':<45} {'numpy, s':>9} {'json, s':>9} {'figures':>8}")
+    for name, model_factory, scenario in CASES:
+        model = model_factory()
+        objects = load_objects(scenario)
+        created = interpolate(model, objects, Output.numpy)
+        numpy_time = min(timeit.repeat(lambda: interpolate(model, objects, Output.numpy), number=1, repeat=repeat))
+        json_time = min(timeit.repeat(lambda: interpolate(model, objects, Output.json), number=1, repeat=repeat))
+        print(f"{name:<20} {scenario.name:<45} {numpy_time:>9.4f} {json_time:>9.4f} {created:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark of the figures serialisation used by the tracker.
+
+Compares `numpy_to_json` of the interpolation models with
+`numpy_to_geometry(...).to_json()` and checks that the results are identical,
+including half-integer, negative and degenerate coordinates.
+
+Run from the repository root:
+    python benchmarks/bench_json_serialisation.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from interpolation import (
+    LinearPointInterpolation,
+    LinearPolygonInterpolation,
+    LinearRectangleInterpolation,
+)
+
+
+def make_coords(rng: np.random.Generator, points: int) -> np.ndarray:
+    coords = rng.uniform(-50, 2000, size=(points, 2))
+    # exact halves and integers are the corner cases of rounding
+    coords[::3] = np.round(coords[::3]) + 0.5
+    coords[1::3] = np.round(coords[1::3])
+    return coords
+
+
+def make_rectangle(rng: np.random.Generator) -> np.ndarray:
+    left_top = make_coords(rng, 1)[0]
+    size = rng.uniform(0, 300, size=2)
+    return np.array([left_top, left_top + size])
+
+
+def check_parity(cases: int = 2000) -> bool:
+    rng = np.random.default_rng(0)
+    point_model = LinearPointInterpolation()
+    rectangle_model = LinearRectangleInterpolation()
+    polygon_model = LinearPolygonInterpolation("greedily")
+
+    for _ in range(cases):
+        try:
+            point_model.checked_numpy_to_json(make_coords(rng, 1))
+            rectangle_model.checked_numpy_to_json(make_rectangle(rng))
+            points = int(rng.integers(1, 50))
+            polygon_model.checked_numpy_to_json(make_coords(rng, points))
+        except ValueError as exc:
+            print(exc)
+            return False
+    return True
+
+
+def bench(name, reference, current, repeat=5):
+    ref_time = min(timeit.repeat(reference, number=1, repeat=repeat))
+    cur_time = min(timeit.repeat(current, number=1, repeat=repeat))
+    print(f"{name:<40} {ref_time:>13.5f} {cur_time:>11.5f} {ref_time / cur_time:>7.1f}x")
+
+
+def main():
+    print(f"identical results: {check_parity()}")
+    print(f"{'case':<40} {'Geometry, s':>13} {'json, s':>11} {'speedup':>8}")
+
+    rng = np.random.default_rng(1)
+    frames = 1000
+    cases = (
+        ("point", LinearPointInterpolation(), [make_coords(rng, 1) for _ in range(frames)]),
+        ("rectangle", LinearRectangleInterpolation(), [make_rectangle(rng) for _ in range(frames)]),
+    )
+    for points in (10, 100, 1000):
+        coords = [make_coords(rng, points) for _ in range(frames)]
+        cases += ((f"polygon {points} points", LinearPolygonInterpolation("greedily"), coords),)
+
+    for name, model, coords in cases:
+        bench(
+            f"{name} x {frames} frames",
+            lambda: [model.numpy_to_geometry(obj).to_json() for obj in coords],
+            lambda: [model.numpy_to_json(obj) for obj in coords],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark of the polygons interpolation with keyframe pairs in a process pool.
+
+Interpolates an object with many dense keyframes in the current process and
+with `executor` set to a process pool, and checks that the results are identical.
+
+Run from the repository root:
+    python benchmarks/bench_polygon_pairs.py [processes]
+"""
+import multiprocessing
+import os
+import sys
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from supervisely import Polygon
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from interpolation import LinearPolygonInterpolation, Output
+
+
+def make_polygon(rng: np.random.Generator, vertices: int) -> Polygon:
+    angles = np.sort(rng.random(vertices)) * 2 * np.pi
+    radius = 200 + 50 * rng.random(vertices)
+    rows = 500 + radius * np.sin(angles)
+    cols = 500 + radius * np.cos(angles)
+    return Polygon(exterior=np.stack((rows, cols), axis=1).astype(int).tolist())
+
+
+def make_object(keyframes: int, vertices: int, gap: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    frames = [idx * gap for idx in range(keyframes)]
+    figures = [make_polygon(rng, vertices + int(rng.integers(0, vertices // 2))) for _ in frames]
+    return frames, figures
+
+
+def interpolate(model, frames, figures):
+    all_frames = list(range(frames[0], frames[-1] + 1))
+    return list(model.interpolate(frames, figures, all_frames, output=Output.numpy))
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    # workers are forked, so they don't import the app entry point again
+    context = multiprocessing.get_context("fork")
+
+    print(f"processes: {processes}")
+    print(f"{'case':<40} {'serial, s':>13} {'pool, s':>11} {'speedup':>8} identical")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        for mode, keyframes, vertices, gap in (
+            ("greedily", 40, 200, 10),
+            ("uniform", 40, 60, 10),
+            ("resampled", 40, 300, 10),
+        ):
+            frames, figures = make_object(keyframes, vertices, gap)
+            serial = LinearPolygonInterpolation(mode, 500)
+            pool = LinearPolygonInterpolation(mode, 500, executor=executor)
+
+            identical = all(
+                np.array_equal(a, b)
+                for a, b in zip(interpolate(serial, frames, figures), interpolate(pool, frames, figures))
+            )
+            serial_time = min(timeit.repeat(lambda: interpolate(serial, frames, figures), number=1, repeat=3))
+            pool_time = min(timeit.repeat(lambda: interpolate(pool, frames, figures), number=1, repeat=3))
+            name = f"{mode} {keyframes} keyframes x {vertices} points"
+            print(f"{name:<40} {serial_time:>13.5f} {pool_time:>11.5f} {serial_time / pool_time:>7.1f}x {identical}")
+
+
+if __name__ == "__main__":
+    main()
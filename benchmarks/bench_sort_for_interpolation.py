@@ -0,0 +1,77 @@
+"""Benchmark of the polygons cyclic alignment used in the uniform mode.
+
+Run from the repository root:
+    python benchmarks/bench_sort_for_interpolation.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from interpolation.utils import sort_for_interpolation
+
+
+def reference_sort_for_interpolation(obj1: np.ndarray, obj2: np.ndarray):
+    """Previous implementation: checks every shift with `np.roll`."""
+    min_d = np.inf
+    shift = 0
+    for i in range(len(obj1)):
+        d = np.sum(np.linalg.norm(np.roll(obj1, -i, axis=0) - obj2, axis=1))
+        if min_d > d:
+            shift = -i
+            min_d = d
+
+    return np.roll(obj1, shift, axis=0), obj2
+
+
+def make_pair(vertices: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    angles = np.sort(rng.random(vertices)) * 2 * np.pi
+    radius = 200 + 20 * np.sin(5 * angles)
+    obj1 = np.stack((500 + radius * np.cos(angles), 500 + radius * np.sin(angles)), axis=1)
+    obj2 = np.roll(obj1 * 1.1 + 15, vertices // 3, axis=0) + rng.normal(0, 2, obj1.shape)
+    return obj1, obj2
+
+
+def make_star_pairs(count: int, seed: int = 0):
+    """Star-shaped polygons densified like in the uniform mode, their best shifts
+    are often far from the best ones by squared distance."""
+    from interpolation.utils.utils import add_points_to_obj
+
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        vertices = int(rng.integers(5, 60))
+        angles = np.sort(rng.random(vertices)) * 2 * np.pi
+        radius = 60 + 50 * rng.random(vertices) * (1 + np.sin(int(rng.integers(2, 9)) * angles))
+        obj1 = np.stack((radius * np.cos(angles), radius * np.sin(angles)), axis=1)
+        obj2 = np.roll(obj1 * rng.uniform(0.8, 1.2), int(rng.integers(vertices)), axis=0)
+        obj2 = obj2 + rng.normal(0, 10, obj1.shape)
+        per_edge = int(rng.integers(0, 4))
+        yield add_points_to_obj(obj1, vertices * per_edge), add_points_to_obj(obj2, vertices * per_edge)
+
+
+def main():
+    same = all(
+        np.array_equal(reference_sort_for_interpolation(obj1, obj2)[0], sort_for_interpolation(obj1, obj2)[0])
+        for obj1, obj2 in make_star_pairs(1500)
+    )
+    print(f"1500 densified star polygons, same as reference: {same}")
+
+    print(f"{'vertices':>8} {'reference, s':>13} {'current, s':>11} {'speedup':>8} {'same':>5}")
+    for vertices in (1000, 2000, 5000, 10000):
+        obj1, obj2 = make_pair(vertices)
+        repeat = 1 if vertices > 2000 else 3
+
+        ref_time = min(timeit.repeat(lambda: reference_sort_for_interpolation(obj1, obj2), number=1, repeat=repeat))
+        cur_time = min(timeit.repeat(lambda: sort_for_interpolation(obj1, obj2), number=1, repeat=repeat))
+        same = np.array_equal(
+            reference_sort_for_interpolation(obj1, obj2)[0], sort_for_interpolation(obj1, obj2)[0]
+        )
+        print(f"{vertices:>8} {ref_time:>13.4f} {cur_time:>11.4f} {ref_time / cur_time:>7.0f}x {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark of the session start.
+
+Every run starts a new interpreter and measures what the app does before it
+can answer `ping` and before the first `track`: the supervisely import, the
+tracker import, creation of the track job and the first job itself (on the
+fake api). The app can't be started without the server, so the `AppService`
+construction is not included. Cleaning of the data directory is measured
+separately, for a directory with `files` files.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [repeat] [files]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARKS_DIR, "..", "src")
+
+CHILD = f"""
+import json, logging, sys, time
+sys.path.extend([{SRC_DIR!r}, {BENCHMARKS_DIR!r}])
+times = [time.perf_counter()]
+import supervisely_lib as sly
+times.append(time.perf_counter())
+from tracker import TrackJob, TrackSettings, TrackSessions, InterpolationCache, TrackScheduler
+times.append(time.perf_counter())
+job = TrackJob(TrackSettings(), sessions=TrackSessions(), cache=InterpolationCache(2 ** 20))
+scheduler = TrackScheduler()
+times.append(time.perf_counter())
+
+from fake_api import FakeApi
+from synthetic import Scenario, make_context, make_figures
+sly.logger.setLevel(logging.WARNING)
+figures = make_figures(Scenario("polygon", objects=2, keyframes=2, gap=10))
+start = time.perf_counter()
+job.run(make_context(figures, 0, 10), FakeApi(figures), logger=logging.getLogger("bench"))
+times.append(time.perf_counter() - start)
+start = time.perf_counter()
+job.run(make_context(figures, 0, 10), FakeApi(figures), logger=logging.getLogger("bench"))
+times.append(time.perf_counter() - start)
+print(json.dumps(times))
+"""
+
+STAGES = [
+    "import supervisely",
+    "import tracker",
+    "create job and scheduler",
+    "first track",
+    "second track",
+]
+
+
+def measure_child():
+    output = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, check=True)
+    times = json.loads(output.stdout.strip().splitlines()[-1])
+    marks, tracks = times[:4], times[4:]
+    return [end - start for start, end in zip(marks, marks[1:])] + tracks
+
+
+def measure_clean_dir(files: int, repeat: int) -> float:
+    sys.path.append(SRC_DIR)
+    import supervisely_lib as sly
+
+    def fill(data_dir):
+        for idx in range(files):
+            with open(os.path.join(data_dir, f"{idx}.json"), "w") as file:
+                file.write("{}")
+
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as data_dir:
+            fill(data_dir)
+            elapsed = timeit.timeit(lambda: sly.fs.clean_dir(data_dir), number=1)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    runs = [measure_child() for _ in range(repeat)]
+    best = [min(stage_times) for stage_times in zip(*runs)]
+    clean_dir = measure_clean_dir(files, repeat)
+
+    print(f"repeat: {repeat}, best of the runs")
+    print(f"{'stage':<40} {'s':>8}")
+    for stage, elapsed in zip(STAGES, best):
+        print(f"{stage:<40} {elapsed:>8.4f}")
+    print(f"{f'clean data dir, {files} files':<40} {clean_dir:>8.4f}")
+
+    # before: everything above, except the tracks, was done before the session started
+    eager = sum(best[:3]) + clean_dir
+    print()
+    print(f"{'ready for ping, eager start':<40} {eager:>8.4f}")
+    print(f"{'ready for ping, lazy start':<40} {best[0]:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
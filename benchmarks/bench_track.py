@@ -0,0 +1,206 @@
+"""End-to-end benchmark of the `track` callback against a local fake api.
+
+Runs `TrackJob` for synthetic videos with points, rectangles and polygons of
+different sizes. Every run gets a new `FakeApi`, so nothing is cached between
+the runs unless `--cache` is set. Prints the best and the median time of every
+scenario with the number of created figures, api requests and bytes sent.
+
+Timings can be saved and compared with a previous run to catch regressions:
+    python benchmarks/bench_track.py --save before.json
+    python benchmarks/bench_track.py --compare before.json
+
+`--check` doesn't measure anything: it checks that incremental re-tracking
+(`TrackJob` with sessions) leaves the same figures on the fake api as a fresh
+track of the same keyframes, after a keyframe or a created figure is edited,
+forward and backward. Exits with status 1 if any case differs.
+
+Run from the repository root:
+    python benchmarks/bench_track.py [--repeat 5] [--latency 0.005] [--quick]
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import supervisely_lib as sly
+
+from fake_api import FakeApi
+from synthetic import Scenario, make_context, make_figures
+from tracker import InterpolationCache, TrackJob, TrackSettings, TrackSessions
+from tracker.tracker import frames_range
+
+
+SCENARIOS = [
+    Scenario("point", objects=50, keyframes=10, gap=30),
+    Scenario("rectangle", objects=50, keyframes=10, gap=30),
+    Scenario("rectangle", objects=5, keyframes=3, gap=500),
+    Scenario("polygon", objects=10, keyframes=5, gap=20, vertices=20),
+    Scenario("polygon", objects=10, keyframes=5, gap=20, vertices=200),
+    Scenario("polygon", objects=2, keyframes=3, gap=300, vertices=60),
+    Scenario("polygon", objects=30, keyframes=10, gap=5, vertices=40),
+    Scenario("rectangle", objects=20, keyframes=2, gap=5000, track_frames=10),
+    Scenario("polygon", objects=5, keyframes=2, gap=5000, vertices=60, track_frames=10),
+]
+
+QUICK_SCENARIOS = [
+    Scenario("point", objects=10, keyframes=5, gap=10),
+    Scenario("rectangle", objects=10, keyframes=5, gap=10),
+    Scenario("polygon", objects=5, keyframes=3, gap=10, vertices=20),
+]
+
+
+def run_once(scenario: Scenario, settings: TrackSettings, args, job: TrackJob = None):
+    figures = make_figures(scenario)
+    api = FakeApi(figures, latency_sec=args.latency)
+    context = make_context(figures, 0, scenario.frames_count)
+    if job is None:
+        job = TrackJob(settings)
+
+    start = time.perf_counter()
+    job.run(context, api, logger=api.logger)
+    elapsed = time.perf_counter() - start
+    return elapsed, api
+
+
+def bench(scenario: Scenario, settings: TrackSettings, args) -> dict:
+    job = None
+    if args.cache:
+        # shared between the runs, like between the calls to the app
+        job = TrackJob(settings, sessions=TrackSessions(), cache=InterpolationCache(256 * 2 ** 20))
+
+    times = []
+    for _ in range(args.repeat):
+        elapsed, api = run_once(scenario, settings, args, job)
+        times.append(elapsed)
+
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "figures": api.created,
+        "requests": sum(api.calls.values()),
+        "bytes": api.bytes_sent,
+    }
+
+
+def stored_figures(api: FakeApi) -> list:
+    """Figures of the fake api, comparable between apis."""
+    return sorted(
+        (figure["objectId"], figure["frame"], json.dumps(figure["geometry"], sort_keys=True))
+        for figure in api.figures.values()
+    )
+
+
+def move_figure(figure: dict, shift: int = 7) -> None:
+    exterior = figure["geometry"]["points"]["exterior"]
+    figure["geometry"]["points"]["exterior"] = [[col + shift, row - shift] for col, row in exterior]
+
+
+def check_retrack(scenario: Scenario, settings: TrackSettings, edit: str, context_args) -> bool:
+    """Track, edit a figure of the first object and track again with sessions,
+    then track the edited keyframes from scratch and compare the figures."""
+    keyframes = make_figures(scenario)
+    context = make_context(keyframes, *context_args)
+    api = FakeApi(keyframes)
+    job = TrackJob(settings, sessions=TrackSessions(), cache=InterpolationCache(2 ** 20))
+    job.run(context, api, logger=api.logger)
+
+    first, last = frames_range(context)
+    edited = copy.deepcopy(keyframes)
+    if edit == "keyframe":
+        # a keyframe inside the track range, not the one the tracking starts from
+        figure = next(
+            figure
+            for figure in edited
+            if figure["objectId"] == 1 and first <= figure["frame"] <= last
+            and figure["frame"] != context["frameIndex"]
+        )
+        move_figure(figure)
+        move_figure(api.figures[figure["id"]])
+    elif edit == "created":
+        # a figure created by the first call becomes a keyframe
+        created = sorted(
+            (
+                figure
+                for figure_id, figure in api.figures.items()
+                if figure_id > len(keyframes) and figure["objectId"] == 1
+            ),
+            key=lambda figure: figure["frame"],
+        )
+        figure = api.figures[created[len(created) // 2]["id"]]
+        move_figure(figure)
+        edited.append({**copy.deepcopy(figure), "id": len(edited) + 1})
+    job.run(context, api, logger=api.logger)
+
+    fresh_api = FakeApi(edited)
+    TrackJob(settings).run(make_context(edited, *context_args), fresh_api, logger=fresh_api.logger)
+    return stored_figures(api) == stored_figures(fresh_api)
+
+
+def check(scenarios, settings: TrackSettings) -> bool:
+    print(f"{'scenario':<55} {'edit':<9} {'track':<22} result")
+    succeeded = True
+    for scenario in scenarios:
+        last_keyframe = (scenario.keyframes - 1) * scenario.gap
+        tracks = [
+            (0, last_keyframe, "forward"),
+            (last_keyframe, last_keyframe, "backward"),
+            (scenario.gap, scenario.gap, "forward"),
+        ]
+        for edit in ["none", "keyframe", "created"]:
+            for context_args in tracks:
+                same = check_retrack(scenario, settings, edit, context_args)
+                succeeded = succeeded and same
+                frame_index, frames, direction = context_args
+                track = f"{direction} {frame_index}, {frames} frames"
+                print(f"{scenario.name:<55} {edit:<9} {track:<22} {'same' if same else 'DIFFERENT'}")
+    return succeeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay of every api request, s")
+    parser.add_argument("--workers", type=int, default=1, help="objects tracked concurrently")
+    parser.add_argument("--cache", action="store_true", help="keep sessions and cache between the runs")
+    parser.add_argument("--quick", action="store_true", help="small scenarios only")
+    parser.add_argument("--save", help="save the results to a json file")
+    parser.add_argument("--compare", help="compare with the results saved by --save")
+    parser.add_argument("--check", action="store_true", help="check re-tracking, no timings")
+    args = parser.parse_args()
+
+    sly.logger.setLevel(logging.WARNING)
+    settings = TrackSettings(tracking_workers=args.workers)
+    if args.check:
+        sys.exit(0 if check(QUICK_SCENARIOS, settings) else 1)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    print(f"repeat: {args.repeat}, latency: {args.latency} s, workers: {args.workers}, cache: {args.cache}")
+    print(f"{'scenario':<55} {'min, s':>9} {'median, s':>10} {'figures':>8} {'requests':>9} {'sent, KB':>9}")
+    results = {}
+    for scenario in QUICK_SCENARIOS if args.quick else SCENARIOS:
+        result = bench(scenario, settings, args)
+        results[scenario.name] = result
+        line = (
+            f"{scenario.name:<55} {result['min']:>9.4f} {result['median']:>10.4f} "
+            f"{result['figures']:>8} {result['requests']:>9} {result['bytes'] / 1024:>9.1f}"
+        )
+        if scenario.name in baseline:
+            line += f"  {result['min'] / baseline[scenario.name]['min']:.2f}x of saved"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""In-memory stand-in for the Supervisely API endpoints used by the tracker.
+
+Keeps the figures of one dataset in a dict and implements `videos.info`,
+`figures.list`, `figures.bulk.add`, `figures.bulk.remove`,
+`videos.objects.get-frames` and `videos.notify-annotation-tool`.
+Every request is counted, with the size of its json body, and can be delayed
+by `latency_sec` to imitate the network.
+"""
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from typing import Dict, List
+
+
+class FakeResponse(object):
+    def __init__(self, data, status_code: int = HTTPStatus.OK) -> None:
+        self._data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self._data
+
+
+class FakeApi(object):
+    """Fake `sly.Api` with the figures of one video.
+
+    Args:
+        figures (List[Dict]): figures with `id`, `objectId`, `frame`, `geometryType`
+            and `geometry` keys.
+        latency_sec (float): delay of every request.
+        stop_at (int): progress notifications return `stopped` from this progress value on.
+    """
+
+    def __init__(
+        self,
+        figures: List[Dict],
+        dataset_id: int = 1,
+        latency_sec: float = 0.0,
+        stop_at: int = None,
+    ) -> None:
+        self.figures = {figure["id"]: dict(figure) for figure in figures}
+        self.dataset_id = dataset_id
+        self.latency_sec = latency_sec
+        self.stop_at = stop_at
+
+        self.logger = logging.getLogger("fake_api")
+        self.calls = Counter()
+        self.bytes_sent = 0
+        self.created = 0
+        self.removed = 0
+        self.progress = []
+
+        self._ids = itertools.count(max(self.figures, default=0) + 1)
+        self._lock = threading.Lock()
+
+    def count(self, method: str, data) -> None:
+        with self._lock:
+            self.calls[method] += 1
+            self.bytes_sent += len(json.dumps(data))
+        if self.latency_sec > 0:
+            time.sleep(self.latency_sec)
+
+    def post(self, method: str, data: Dict, **kwargs) -> FakeResponse:
+        self.count(method, data)
+        handler = getattr(self, "_" + method.replace(".", "_").replace("-", "_"), None)
+        if handler is None:
+            raise KeyError(f"Method {method} is not supported by the fake api.")
+        with self._lock:
+            return FakeResponse(handler(data))
+
+    def _videos_info(self, data: Dict) -> Dict:
+        return {"id": data["id"], "datasetId": self.dataset_id}
+
+    def _figures_list(self, data: Dict) -> Dict:
+        entities = sorted(self.figures.values(), key=lambda figure: figure["id"])
+        for condition in data.get("filter", []):
+            values = set(condition["value"])
+            entities = [figure for figure in entities if figure[condition["field"]] in values]
+
+        per_page = data.get("per_page", 1000)
+        page = data.get("page", 1)
+        page_entities = entities[(page - 1) * per_page : page * per_page]
+        return {
+            "entities": [self._figure_info(figure) for figure in page_entities],
+            "total": len(entities),
+            "perPage": per_page,
+            "pagesCount": max(1, -(-len(entities) // per_page)),
+        }
+
+    def _figures_bulk_add(self, data: Dict) -> List[Dict]:
+        created = []
+        for figure in data["figures"]:
+            figure_id = next(self._ids)
+            self.figures[figure_id] = {
+                "id": figure_id,
+                "objectId": figure["objectId"],
+                "frame": figure["meta"]["frame"],
+                "geometryType": figure["geometryType"],
+                "geometry": figure["geometry"],
+            }
+            created.append({"id": figure_id})
+        self.created += len(created)
+        return created
+
+    def _figures_bulk_remove(self, data: Dict) -> Dict:
+        for figure_id in data["figureIds"]:
+            self.figures.pop(figure_id, None)
+        self.removed += len(data["figureIds"])
+        return {"success": True}
+
+    def _videos_objects_get_frames(self, data: Dict) -> List[List[int]]:
+        frames = {object_id: set() for object_id in data["objectIds"]}
+        for figure in self.figures.values():
+            if figure["objectId"] in frames:
+                frames[figure["objectId"]].add(figure["frame"])
+        return [sorted(frames[object_id]) for object_id in data["objectIds"]]
+
+    def _videos_notify_annotation_tool(self, data: Dict) -> Dict:
+        progress = data["data"].get("progress")
+        if progress is None:
+            return {"success": True}
+        self.progress.append((progress["current"], progress["total"]))
+        return {"stopped": self.stop_at is not None and progress["current"] >= self.stop_at}
+
+    @staticmethod
+    def _figure_info(figure: Dict) -> Dict:
+        return {
+            "id": figure["id"],
+            "objectId": figure["objectId"],
+            "meta": {"frame": figure["frame"]},
+            "geometry": figure["geometry"],
+            "geometryType": figure["geometryType"],
+        }
@@ -0,0 +1,110 @@
+"""Synthetic video annotations for the benchmarks.
+
+Objects are shapes that drift across the frame between keyframes, so the
+interpolation does the same work it does on real annotations. Everything is
+generated from a seed, the same scenario always gives the same figures.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Scenario:
+    """Annotation of one video.
+
+    Args:
+        geometry_type (str): `point`, `rectangle` or `polygon`.
+        objects (int): number of objects.
+        keyframes (int): number of keyframes per object.
+        gap (int): frames between keyframes.
+        vertices (int): polygon vertices, keyframes get up to 50% more.
+        track_frames (int): frames to track from the first keyframe, all frames by default.
+    """
+
+    geometry_type: str
+    objects: int = 10
+    keyframes: int = 5
+    gap: int = 20
+    vertices: int = 20
+    seed: int = 0
+    track_frames: int = None
+
+    @property
+    def name(self) -> str:
+        name = f"{self.geometry_type} {self.objects}x{self.keyframes} keyframes, gap {self.gap}"
+        if self.geometry_type == "polygon":
+            name += f", {self.vertices} points"
+        if self.track_frames is not None:
+            name += f", track {self.track_frames}"
+        return name
+
+    @property
+    def frames_count(self) -> int:
+        if self.track_frames is not None:
+            return self.track_frames
+        return (self.keyframes - 1) * self.gap
+
+
+def make_geometry(rng: np.random.Generator, geometry_type: str, center: np.ndarray, vertices: int) -> Dict:
+    """Geometry json with [col, row] points around `center`."""
+    if geometry_type == "point":
+        exterior = [center]
+    elif geometry_type == "rectangle":
+        half = rng.integers(10, 60, size=2)
+        exterior = [center - half, center + half]
+    elif geometry_type == "polygon":
+        count = vertices + int(rng.integers(0, vertices // 2 + 1))
+        angles = np.sort(rng.random(count)) * 2 * np.pi
+        radius = 40 + 20 * rng.random(count)
+        exterior = center + np.stack((np.cos(angles), np.sin(angles)), axis=1) * radius[:, None]
+    else:
+        raise ValueError(f"Geometry type {geometry_type} is not supported.")
+
+    exterior = np.rint(exterior).astype(int).tolist()
+    return {"points": {"exterior": exterior, "interior": []}}
+
+
+def make_figures(scenario: Scenario) -> List[Dict]:
+    """Keyframe figures of all objects, objects are numbered from 1."""
+    rng = np.random.default_rng(scenario.seed)
+    figures = []
+    for object_id in range(1, scenario.objects + 1):
+        center = rng.integers(200, 800, size=2)
+        for keyframe in range(scenario.keyframes):
+            center = center + rng.integers(-30, 31, size=2)
+            figures.append(
+                {
+                    "id": len(figures) + 1,
+                    "objectId": object_id,
+                    "frame": keyframe * scenario.gap,
+                    "geometryType": scenario.geometry_type,
+                    "geometry": make_geometry(rng, scenario.geometry_type, center, scenario.vertices),
+                }
+            )
+    return figures
+
+
+def make_context(figures: List[Dict], frame_index: int, frames: int, direction: str = "forward") -> Dict:
+    """`track` context for all objects with a figure on `frame_index`."""
+    selected = [figure for figure in figures if figure["frame"] == frame_index]
+    return {
+        "trackId": "benchmark",
+        "videoId": 1,
+        "frameIndex": frame_index,
+        "frames": frames,
+        "direction": direction,
+        "objectIds": sorted({figure["objectId"] for figure in selected}),
+        "figureIds": [figure["id"] for figure in selected],
+    }
+
+
+def make_keyframes(scenario: Scenario) -> Dict[int, Tuple[List[int], List[Dict]]]:
+    """Frames and geometry jsons of every object."""
+    objects = {}
+    for figure in make_figures(scenario):
+        frames, geometries = objects.setdefault(figure["objectId"], ([], []))
+        frames.append(figure["frame"])
+        geometries.append(figure["geometry"])
+    return objects
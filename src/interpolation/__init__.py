@@ -1,3 +1,4 @@
+from interpolation.base import Output
 from interpolation.rectangle import LinearRectangleInterpolation
 from interpolation.polygon import LinearPolygonInterpolation
 from interpolation.point import LinearPointInterpolation
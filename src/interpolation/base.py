@@ -1,8 +1,20 @@
 import numpy as np
 
-from typing import List, Callable
+from enum import Enum
+from typing import Callable, Dict, Hashable, Iterator, List, Union
 from supervisely.geometry.geometry import Geometry
 
+from interpolation.utils import bracketing_keyframes
+
+
+class Output(Enum):
+    """Format of the interpolated figures."""
+
+    geometry: str = "geometry"
+    json: str = "json"
+    numpy: str = "numpy"
+
+
 
 class BaseInterpolation(object):
     """Base class for interpolation.
@@ -11,31 +23,118 @@ class BaseInterpolation(object):
         - geometry_to_numpy() - transforms Geometry (point, rectangle, polygon etc.)
             to numpy array with (n, 2) shape;
         - numpy_to_geometry() - transforms numpy array to Geometry;
+        - numpy_to_json() - transforms numpy array to Geometry json
+            without creating Geometry;
         - one_point_coord_interpolation() - 1d-interpolation.
+
+    `coords_interpolation()` can be overridden to interpolate all vertices of
+    all frames at once instead of calling `one_point_coord_interpolation()`
+    for every coordinate, and `coords_interpolation_batch()` - to interpolate
+    several objects at once.
     """
 
+    supports_batch = True
+    # frames evaluated by one call of `coords_interpolation_batch()`
+    batch_block_frames = 512
+    geometry_type = None
+
     def __init__(self):
         self.figures = []
         self.meta = {}
+        # compare every json from numpy_to_json() with Geometry.to_json()
+        self.validate_json = False
+        # object with `count(name, value)` method to record the interpolated frames
+        # and vertices to, e.g. `tracker.metrics.TrackMetrics`
+        self.metrics = None
 
     def interpolate(
-        self, frames: List[int], figures: List[Geometry], all_frames: List[int]
-    ) -> List[Geometry]:
+        self,
+        frames: List[int],
+        figures: List[Geometry],
+        all_frames: List[int],
+        output: Output = Output.geometry,
+        object_params: Hashable = None,
+    ) -> Iterator[Union[Geometry, Dict, np.ndarray]]:
         """Init interpolation function.
 
         Args:
             frames (List[int]): frames indices where the figure appears.
             figures (List[Geometry]): figures (1 per frame).
-            all_frames (List[int]): The frames at which to evaluate the interpolated values.
+            all_frames (List[int]): The frames at which to evaluate the interpolated values,
+                increasing. Only the keyframes around them are used.
+            output (Output): Geometry, json (see `numpy_to_json()`)
+                or numpy arrays with (n, 2) shape.
+            object_params (Hashable): result of `object_params()` for all figures of the object,
+                when only a part of its figures is interpolated.
 
         Returns:
-            List[Geometry]: The interpolated Geometry, same length as `all_frames`.
+            Iterator[Union[Geometry, Dict, np.ndarray]]: The interpolated figures,
+                same length as `all_frames`.
+                Figures are created lazily, one frame at a time.
         """
+        if len(all_frames) > 0:
+            first, last = bracketing_keyframes(frames, all_frames[0], all_frames[-1])
+            frames, figures = frames[first : last + 1], figures[first : last + 1]
         self.figures = figures  # to use in geometry_to_numpy() if needed
-        frames_with_figures = frames
         np_figures = [self.geometry_to_numpy(fig) for fig in figures]
-        interpolation = self._create_vectorized_interpolation(all_frames, frames_with_figures)
-        return self._interpolate(np_figures, interpolation)
+        return self._interpolate(all_frames, frames, np_figures, output)
+
+    def interpolate_batch(
+        self,
+        frames: List[List[int]],
+        figures: List[List[Geometry]],
+        all_frames: List[int],
+        output: Output = Output.geometry,
+    ) -> List[Iterator[Union[Geometry, Dict, np.ndarray]]]:
+        """Interpolate several objects with the same number of points at once.
+
+        Args:
+            frames (List[List[int]]): frames indices where the figure appears, for every object.
+            figures (List[List[Geometry]]): figures (1 per frame), for every object.
+            all_frames (List[int]): The frames at which to evaluate the interpolated values.
+            output (Output): Geometry, json or numpy array figures.
+
+        Returns:
+            List[Iterator[Union[Geometry, Dict, np.ndarray]]]: The interpolated figures for every object,
+                same length as `all_frames`.
+        """
+        max_figures = max(len(obj_frames) for obj_frames in frames)
+        np_frames = np.zeros((len(frames), max_figures), dtype=np.int64)
+        mask = np.zeros((len(frames), max_figures), dtype=bool)
+        np_figures = None
+
+        for idx, (obj_frames, obj_figures) in enumerate(zip(frames, figures)):
+            self.figures = obj_figures
+            obj_np = np.array([self.geometry_to_numpy(fig) for fig in obj_figures])
+            if np_figures is None:
+                np_figures = np.zeros((len(frames), max_figures, *obj_np.shape[1:]))
+
+            np_frames[idx, : len(obj_frames)] = obj_frames
+            mask[idx, : len(obj_frames)] = True
+            np_figures[idx, : len(obj_figures)] = obj_np
+
+        # evaluated in blocks of frames, so the intermediate arrays of the kernel
+        # are bounded by the block instead of the whole range
+        interp_v = None
+        for start in range(0, max(len(all_frames), 1), self.batch_block_frames):
+            block = all_frames[start : start + self.batch_block_frames]
+            block_v = self.coords_interpolation_batch(block, np_frames, np_figures, mask)
+            if interp_v is None:
+                shape = (len(frames), len(all_frames), *block_v.shape[2:])
+                interp_v = np.empty(shape, dtype=block_v.dtype)
+            interp_v[:, start : start + len(block)] = block_v
+        self._count_interpolated(interp_v)
+        convert = self.converter(output)
+        return [(convert(coords) for coords in obj_coords) for obj_coords in interp_v]
+
+    def settings_key(self) -> Hashable:
+        """Model settings which affect the interpolation result."""
+        return type(self).__name__
+
+    def object_params(self, figures: List[Geometry]) -> Hashable:
+        """Parameters computed from all figures of an object, which affect
+        the interpolation of every pair of neighbouring figures."""
+        return None
 
     def geometry_to_numpy(self, obj: Geometry) -> np.ndarray:
         """Transform Geometry to npumpy array with (n, 2) shape."""
@@ -45,6 +144,19 @@ class BaseInterpolation(object):
         """Transform numpy array to Geometry."""
         raise NotImplementedError
 
+    def numpy_to_json(self, obj: np.ndarray) -> Dict:
+        """Transform numpy array to json, equal to `numpy_to_geometry(obj).to_json()`."""
+        raise NotImplementedError
+
+    def checked_numpy_to_json(self, obj: np.ndarray) -> Dict:
+        """Same as `numpy_to_json()`, but raises ValueError if the json differs
+        from the json of the Geometry created by `numpy_to_geometry()`."""
+        data = self.numpy_to_json(obj)
+        expected = self.numpy_to_geometry(obj).to_json()
+        if data != expected:
+            raise ValueError(f"Wrong {self.geometry_type} json: {data}, expected: {expected}.")
+        return data
+
     def one_point_coord_interpolation(
         self,
         all_frames: List[int],
@@ -63,6 +175,51 @@ class BaseInterpolation(object):
         """
         raise NotImplementedError
 
+    def coords_interpolation(
+        self,
+        all_frames: List[int],
+        frames_with_figures: List[int],
+        np_figures: np.ndarray,
+    ) -> np.ndarray:
+        """Interpolate all points of the figures.
+
+        Args:
+            all_frames (List[int]): The frames at which to evaluate the interpolated values.
+            frames_with_figures (List[int]): The frames idices of the figures.
+            np_figures (np.ndarray): figures points with (k, n, 2) shape,
+                `k` is the same as length of `frames_with_figures`.
+        Returns:
+            np.ndarray: The interpolated points with (len(all_frames), n, 2) shape.
+        """
+        interpolation_func = self._create_vectorized_interpolation(all_frames, frames_with_figures)
+        x_interp = interpolation_func(np_figures[:, :, 0].T)
+        y_interp = interpolation_func(np_figures[:, :, 1].T)
+        return np.stack((x_interp.T, y_interp.T), axis=-1)
+
+    def coords_interpolation_batch(
+        self,
+        all_frames: List[int],
+        frames_with_figures: np.ndarray,
+        np_figures: np.ndarray,
+        mask: np.ndarray,
+    ) -> np.ndarray:
+        """Interpolate all points of the figures of several objects.
+
+        Args:
+            all_frames (List[int]): The frames at which to evaluate the interpolated values.
+            frames_with_figures (np.ndarray): The frames idices of the figures with (o, k) shape.
+            np_figures (np.ndarray): figures points with (o, k, n, 2) shape.
+            mask (np.ndarray): boolean (o, k) mask of the existing figures.
+        Returns:
+            np.ndarray: The interpolated points with (o, len(all_frames), n, 2) shape.
+        """
+        return np.array(
+            [
+                self.coords_interpolation(all_frames, obj_frames[obj_mask], obj_figures[obj_mask])
+                for obj_frames, obj_figures, obj_mask in zip(frames_with_figures, np_figures, mask)
+            ]
+        )
+
     def _create_vectorized_interpolation(
         self, all_frames, frames_with_figures
     ) -> Callable[[np.ndarray], np.ndarray]:
@@ -75,27 +232,33 @@ class BaseInterpolation(object):
 
         return np.vectorize(interpolate, signature="(n)->(m)")
 
+    def converter(self, output: Output) -> Callable[[np.ndarray], Union[Geometry, Dict, np.ndarray]]:
+        """Function to transform numpy array to the `output` format."""
+        if output is Output.numpy:
+            return np.asarray
+        if output is Output.geometry:
+            return self.numpy_to_geometry
+        if self.validate_json:
+            return self.checked_numpy_to_json
+        return self.numpy_to_json
+
     def _interpolate(
         self,
+        all_frames: List[int],
+        frames_with_figures: List[int],
         np_figures: List[np.ndarray],
-        interpolation_func: Callable[[np.ndarray], np.ndarray],
-    ) -> List[Geometry]:
-        np_figures = np.array(np_figures)
-        x_coords = np_figures[:, :, 0].T
-        y_coords = np_figures[:, :, 1].T
-        x_interp = interpolation_func(x_coords)
-        y_interp = interpolation_func(y_coords)
-        frames_count = x_interp.shape[1]
-
-        def fin_vector(frame_idx):
-            x = x_interp[:, frame_idx]
-            y = y_interp[:, frame_idx]
-            return np.vstack((x, y)).T
-
-        interp_v = []
-
-        for idx in range(frames_count):
-            geom = self.numpy_to_geometry(fin_vector(idx))
-            interp_v.append(geom)
-
-        return interp_v
+        output: Output = Output.geometry,
+    ) -> Iterator[Union[Geometry, Dict, np.ndarray]]:
+        interp_v = self.coords_interpolation(all_frames, frames_with_figures, np.array(np_figures))
+        self._count_interpolated(interp_v)
+        convert = self.converter(output)
+
+        for frame_coords in interp_v:
+            yield convert(frame_coords)
+
+    def _count_interpolated(self, interp_v: np.ndarray) -> None:
+        """Record interpolated points with (..., frames, n, 2) shape to `metrics`."""
+        if self.metrics is None:
+            return
+        self.metrics.count("frames_interpolated", int(np.prod(interp_v.shape[:-2])))
+        self.metrics.count("vertices_interpolated", interp_v.size // 2)
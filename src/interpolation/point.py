@@ -1,12 +1,16 @@
 import numpy as np
-from typing import List
+from typing import Dict, List
 from supervisely.geometry.geometry import Geometry
+from supervisely.geometry.constants import EXTERIOR, INTERIOR, POINTS
 from supervisely import Point
 
 from interpolation.base import BaseInterpolation
+from interpolation.utils import batch_linear_interpolation, linear_interpolation
 
 
 class BasePointInterpolation(BaseInterpolation):
+    geometry_type = Point.geometry_name()
+
     def geometry_to_numpy(self, obj: Geometry) -> np.ndarray:
         if not isinstance(obj, Point):
             raise TypeError("Can interpolate only Points.")
@@ -16,6 +20,11 @@ class BasePointInterpolation(BaseInterpolation):
         row, col = obj.squeeze()
         return Point(row=row, col=col)
 
+    def numpy_to_json(self, obj: np.ndarray) -> Dict:
+        # PointLocation rounds the coordinates with built-in round()
+        row, col = obj.squeeze().tolist()
+        return {POINTS: {EXTERIOR: [[round(col), round(row)]], INTERIOR: []}}
+
 
 class LinearPointInterpolation(BasePointInterpolation):
     def one_point_coord_interpolation(
@@ -25,3 +34,20 @@ class LinearPointInterpolation(BasePointInterpolation):
         coord_values: np.ndarray,
     ) -> np.ndarray:
         return np.interp(all_frames, frames_with_figures, coord_values)
+
+    def coords_interpolation(
+        self,
+        all_frames: List[int],
+        frames_with_figures: List[int],
+        np_figures: np.ndarray,
+    ) -> np.ndarray:
+        return linear_interpolation(all_frames, frames_with_figures, np_figures)
+
+    def coords_interpolation_batch(
+        self,
+        all_frames: List[int],
+        frames_with_figures: np.ndarray,
+        np_figures: np.ndarray,
+        mask: np.ndarray,
+    ) -> np.ndarray:
+        return batch_linear_interpolation(all_frames, frames_with_figures, np_figures, mask)
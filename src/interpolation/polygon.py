@@ -1,24 +1,39 @@
 from __future__ import annotations
+import bisect
 import numpy as np
+from collections import deque
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
 from enum import Enum
-from typing import List
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Union
 from supervisely.geometry.geometry import Geometry
+from supervisely.geometry.constants import (
+    EXTERIOR,
+    GEOMETRY_SHAPE,
+    GEOMETRY_TYPE,
+    INTERIOR,
+    POINTS,
+)
 from supervisely import Polygon, PointLocation
 
-from interpolation.base import BaseInterpolation
+from interpolation.base import BaseInterpolation, Output
 from interpolation.utils import (
     obj_order_sign,
+    bracketing_keyframes,
     min_dist,
     add_points_to_obj,
-    rm_points,
+    rm_points_mask,
     sort_for_interpolation,
     add_points_to_obj_greedily,
+    resample_obj,
+    linear_interpolation,
 )
 
 
 class ShapeComplexity(Enum):
     greedily: str = "greedily"
     uniform: str = "uniform"
+    resampled: str = "resampled"
 
     @classmethod
     def get(cls, complexity_type: str) -> ShapeComplexity:
@@ -26,21 +41,68 @@ class ShapeComplexity(Enum):
             return ShapeComplexity.greedily
         elif complexity_type == "uniform":
             return ShapeComplexity.uniform
+        elif complexity_type == "resampled":
+            return ShapeComplexity.resampled
         raise ValueError(f"Comlexity type {complexity_type} does not exists")
 
 
 class BasePolygonInterpolation(BaseInterpolation):
-    def __init__(self, shape_complexity: "greedily"):
+    supports_batch = False
+    geometry_type = Polygon.geometry_name()
+
+    def __init__(
+        self,
+        shape_complexity: "greedily",
+        points_count: int = 0,
+        max_points: int = 1000,
+        executor: Optional[Executor] = None,
+        max_pending_pairs: int = 16,
+    ):
+        """
+        Args:
+            shape_complexity (str): polygons matching algorithm.
+            points_count (int): number of points in `resampled` mode,
+                can't be less than number of points of the interpolated polygons.
+            max_points (int): upper bound of points number in `resampled` mode.
+            executor (Executor): process pool to interpolate pairs of keyframes in,
+                the pairs are interpolated in the current process if it is not set.
+            max_pending_pairs (int): number of pairs sent to `executor` ahead.
+        """
         self.shape_complexity = ShapeComplexity.get(shape_complexity)
+        self.points_count = points_count
+        self.max_points = max_points
+        self.executor = executor
+        self.max_pending_pairs = max_pending_pairs
         super().__init__()
 
+    def settings_key(self) -> Hashable:
+        return (
+            type(self).__name__,
+            self.shape_complexity.value,
+            self.points_count,
+            self.max_points,
+        )
+
+    def object_params(self, figures: List[Geometry]) -> Hashable:
+        # all figures are brought to the points order of the first one
+        return obj_order_sign(figures[0].exterior_np)
+
     def numpy_to_geometry(self, obj: np.ndarray) -> Geometry:
-        if self.shape_complexity is ShapeComplexity.uniform:
-            obj = rm_points(obj, self._min_d, self._new_per_side)
         obj = obj.astype(int)
         exterior = [PointLocation(*obj_point) for obj_point in obj]
         return Polygon(exterior=exterior)
 
+    def numpy_to_json(self, obj: np.ndarray) -> Dict:
+        exterior = obj.astype(int)[:, ::-1].tolist()
+        if len(exterior) < 3:
+            # Polygon constructor completes exterior up to 3 points the same way
+            exterior.extend([exterior[-1]] * (3 - len(exterior)))
+        return {
+            POINTS: {EXTERIOR: exterior, INTERIOR: []},
+            GEOMETRY_SHAPE: self.geometry_type,
+            GEOMETRY_TYPE: self.geometry_type,
+        }
+
     def geometry_to_numpy(self, obj: Geometry) -> np.ndarray:
         if not isinstance(obj, Polygon):
             raise ValueError("Use only for polygons.")
@@ -56,51 +118,157 @@ class BasePolygonInterpolation(BaseInterpolation):
         frames: List[int],
         figures: List[Geometry],
         all_frames: List[int],
-    ) -> List[Geometry]:
+        output: Output = Output.geometry,
+        object_params: Hashable = None,
+    ) -> Iterator[Union[Geometry, Dict, np.ndarray]]:
         fig1 = figures[0]
 
         if not isinstance(fig1, Polygon):
             raise ValueError("You can use this class only for polygons.")
 
-        self._sgn = obj_order_sign(fig1.exterior_np)
+        if object_params is None:
+            object_params = self.object_params(figures)
+        self._sgn = object_params
+        if len(all_frames) == 0:
+            return
+
+        # only the pairs of keyframes around `all_frames` are interpolated
+        first, last = bracketing_keyframes(frames, all_frames[0], all_frames[-1])
+        frames, figures = frames[first : last + 1], figures[first : last + 1]
+        if all_frames[0] == frames[0]:
+            fig1 = figures[0]
+            if output is Output.json:
+                yield fig1.to_json()
+            elif output is Output.numpy:
+                yield fig1.exterior_np
+            else:
+                yield fig1
+
         figures_np = [self.geometry_to_numpy(fig) for fig in figures]
-        fig_pairs = zip(figures_np[:-1], figures_np[1:])
-        frame_pairs = zip(frames[:-1], frames[1:])
-        interp_geoms = [figures[0]]
-
-        for figs_p, frm_p in zip(fig_pairs, frame_pairs):
-            start_frame, end_frame = frm_p
-            start_fig, end_fig = figs_p
-
-            start_len, end_len = len(start_fig), len(end_fig)
-            self._min_d = min(min_dist(start_fig), min_dist(end_fig))
-
-            # create points for
-            if self.shape_complexity is ShapeComplexity.uniform:
-                lcm_len = np.lcm(start_len, end_len)
-                start_total_points = lcm_len - start_len
-                end_total_points = lcm_len - end_len
-                self._new_per_side = min(
-                    start_total_points // start_len,
-                    end_total_points // end_len,
-                )
-                start_fig = add_points_to_obj(start_fig, start_total_points)
-                end_fig = add_points_to_obj(end_fig, end_total_points)
-                # sort
-                start_fig, end_fig = sort_for_interpolation(start_fig, end_fig)
-            elif self.shape_complexity is ShapeComplexity.greedily:
-                start_fig, end_fig = add_points_to_obj_greedily(start_fig, end_fig)
-
-            # # sort
-            # start_fig, end_fig = sort_for_interpolation(start_fig, end_fig)
-
-            # interpolate
-            interpolation = self._create_vectorized_interpolation(
-                list(range(start_frame, end_frame + 1)), frm_p
+        pairs = []
+        for idx in range(len(frames) - 1):
+            # the first frame of the pair is the last frame of the previous one
+            start = bisect.bisect_right(all_frames, frames[idx])
+            end = bisect.bisect_right(all_frames, frames[idx + 1])
+            if start < end:
+                pair_figures = (figures_np[idx], figures_np[idx + 1])
+                pair_frames = list(all_frames[start:end])
+                pairs.append((*pair_figures, frames[idx], frames[idx + 1], pair_frames))
+
+        convert = self.converter(output)
+        for interp_v, keep in self._map_pairs(pairs):
+            self._count_interpolated(interp_v)
+            for idx in range(len(interp_v)):
+                if keep is None:
+                    yield convert(interp_v[idx])
+                else:
+                    yield convert(interp_v[idx][keep[idx]])
+
+    def _map_pairs(self, pairs: List[tuple]) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """`interpolate_pair()` for every tuple of its arguments in `pairs`, in order.
+        Pairs are sent to `executor` if it is set, the pairs which can't be
+        interpolated there because a worker process has died are interpolated
+        in the current process."""
+        if self.executor is None or len(pairs) < 2:
+            yield from (self.interpolate_pair(*pair) for pair in pairs)
+            return
+
+        settings = (type(self), self.shape_complexity.value, self.points_count, self.max_points)
+        pending = deque()
+        try:
+            for pair in pairs:
+                try:
+                    future = self.executor.submit(_interpolate_pair_task, settings, *pair)
+                except BrokenProcessPool:
+                    future = None
+                pending.append((pair, future))
+                if len(pending) >= self.max_pending_pairs:
+                    yield self._pair_result(*pending.popleft())
+            while pending:
+                yield self._pair_result(*pending.popleft())
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _pair_result(
+        self, pair: tuple, future: Optional[Future]
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Result of the pair sent to `executor`, the pair is interpolated
+        in the current process if a worker process has died."""
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                pass
+        return self.interpolate_pair(*pair)
+
+    def interpolate_pair(
+        self,
+        start_fig: np.ndarray,
+        end_fig: np.ndarray,
+        start_frame: int,
+        end_frame: int,
+        pair_frames: Optional[List[int]] = None,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Match the points of two neighbouring keyframes and interpolate between them.
+
+        Args:
+            start_fig (np.ndarray): points of the first figure with (n, 2) shape.
+            end_fig (np.ndarray): points of the second figure with (m, 2) shape.
+            start_frame (int): frame index of the first figure.
+            end_frame (int): frame index of the second figure.
+            pair_frames (List[int]): frames to interpolate,
+                every frame from `start_frame` to `end_frame` by default.
+        Returns:
+            Tuple[np.ndarray, Optional[np.ndarray]]: points for every frame of `pair_frames`
+                with (frames, k, 2) shape and the (frames, k) mask
+                of the points to keep in `uniform` mode (None in other modes).
+        """
+        start_len, end_len = len(start_fig), len(end_fig)
+        min_d = min(min_dist(start_fig), min_dist(end_fig))
+
+        # create points for
+        if self.shape_complexity is ShapeComplexity.uniform:
+            lcm_len = np.lcm(start_len, end_len)
+            start_total_points = lcm_len - start_len
+            end_total_points = lcm_len - end_len
+            new_per_side = min(
+                start_total_points // start_len,
+                end_total_points // end_len,
             )
-            interp_geoms.extend(self._interpolate([start_fig, end_fig], interpolation)[1:])
+            start_fig = add_points_to_obj(start_fig, start_total_points)
+            end_fig = add_points_to_obj(end_fig, end_total_points)
+            # sort
+            start_fig, end_fig = sort_for_interpolation(start_fig, end_fig)
+        elif self.shape_complexity is ShapeComplexity.resampled:
+            total_points = max(self.points_count, start_len, end_len)
+            total_points = min(total_points, self.max_points)
+            start_fig = resample_obj(start_fig, total_points)
+            end_fig = resample_obj(end_fig, total_points)
+            start_fig, end_fig = sort_for_interpolation(start_fig, end_fig)
+        elif self.shape_complexity is ShapeComplexity.greedily:
+            start_fig, end_fig = add_points_to_obj_greedily(start_fig, end_fig)
+
+        # # sort
+        # start_fig, end_fig = sort_for_interpolation(start_fig, end_fig)
+
+        # interpolate
+        if pair_frames is None:
+            pair_frames = list(range(start_frame, end_frame + 1))
+        interp_v = self.coords_interpolation(
+            pair_frames, [start_frame, end_frame], np.array([start_fig, end_fig])
+        )
+        if self.shape_complexity is not ShapeComplexity.uniform:
+            return interp_v, None
+        return interp_v, rm_points_mask(interp_v, min_d, new_per_side)
 
-        return interp_geoms
+
+def _interpolate_pair_task(settings: tuple, *pair) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """`interpolate_pair()` in a worker process, the model is created from its settings."""
+    model_cls, shape_complexity, points_count, max_points = settings
+    model = model_cls(shape_complexity, points_count, max_points)
+    return model.interpolate_pair(*pair)
 
 
 class LinearPolygonInterpolation(BasePolygonInterpolation):
@@ -111,3 +279,11 @@ class LinearPolygonInterpolation(BasePolygonInterpolation):
         coord_values: np.ndarray,
     ) -> np.ndarray:
         return np.interp(all_frames, frames_with_figures, coord_values)
+
+    def coords_interpolation(
+        self,
+        all_frames: List[int],
+        frames_with_figures: List[int],
+        np_figures: np.ndarray,
+    ) -> np.ndarray:
+        return linear_interpolation(all_frames, frames_with_figures, np_figures)
@@ -1,13 +1,17 @@
 import numpy as np
 
-from typing import List
+from typing import Dict, List
 from supervisely.geometry.geometry import Geometry
+from supervisely.geometry.constants import EXTERIOR, INTERIOR, POINTS
 from supervisely import Rectangle
 
 from interpolation.base import BaseInterpolation
+from interpolation.utils import batch_linear_interpolation, linear_interpolation
 
 
 class BaseRectangleInterpolation(BaseInterpolation):
+    geometry_type = Rectangle.geometry_name()
+
     def geometry_to_numpy(self, obj: Geometry) -> np.ndarray:
         if not isinstance(obj, Rectangle):
             raise TypeError("Can interpolate only Rectangles.")
@@ -28,6 +32,15 @@ class BaseRectangleInterpolation(BaseInterpolation):
         )
         return fig
 
+    def numpy_to_json(self, obj: np.ndarray) -> Dict:
+        (left, top), (right, bottom) = obj.astype(int).tolist()
+        # the same checks as in Rectangle constructor
+        if top > bottom:
+            raise ValueError('Rectangle "top" argument must have less or equal value then "bottom"!')
+        if left > right:
+            raise ValueError('Rectangle "left" argument must have less or equal value then "right"!')
+        return {POINTS: {EXTERIOR: [[left, top], [right, bottom]], INTERIOR: []}}
+
 
 class LinearRectangleInterpolation(BaseRectangleInterpolation):
     def one_point_coord_interpolation(
@@ -38,11 +51,28 @@ class LinearRectangleInterpolation(BaseRectangleInterpolation):
     ) -> np.ndarray:
         return np.interp(all_frames, frames_with_figures, coord_values)
 
+    def coords_interpolation(
+        self,
+        all_frames: List[int],
+        frames_with_figures: List[int],
+        np_figures: np.ndarray,
+    ) -> np.ndarray:
+        return linear_interpolation(all_frames, frames_with_figures, np_figures)
+
+    def coords_interpolation_batch(
+        self,
+        all_frames: List[int],
+        frames_with_figures: np.ndarray,
+        np_figures: np.ndarray,
+        mask: np.ndarray,
+    ) -> np.ndarray:
+        return batch_linear_interpolation(all_frames, frames_with_figures, np_figures, mask)
+
 
 def main():
     figures = [Rectangle(0, 10, 10, 20), Rectangle(10, 20, 33, 35)]
     model = LinearRectangleInterpolation()
-    int = model.interpolate([3, 6], figures, [3, 4, 5, 6])
+    int = list(model.interpolate([3, 6], figures, [3, 4, 5, 6]))
     print(len(int))
 
 
@@ -1,8 +1,119 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import List, Tuple, Dict
 from collections import namedtuple
 
 
+def linear_interpolation(
+    all_frames: List[int], frames_with_figures: List[int], figures: np.ndarray
+) -> np.ndarray:
+    """Interpolate all vertices of all figures at once.
+
+    Matches `np.interp` applied to every coordinate separately: frames outside
+    of `frames_with_figures` get the values of the nearest figure.
+
+    Args:
+        all_frames (List[int]): The frames at which to evaluate the interpolated values.
+        frames_with_figures (List[int]): increasing frames indices of the figures.
+        figures (np.ndarray): figures points with (k, n, 2) shape,
+            `k` is the same as length of `frames_with_figures`.
+
+    Returns:
+        np.ndarray: interpolated points with (len(all_frames), n, 2) shape.
+    """
+    x = np.asarray(all_frames, dtype=np.float64)
+    xp = np.asarray(frames_with_figures, dtype=np.float64)
+    fp = np.asarray(figures, dtype=np.float64)
+
+    if len(xp) == 1:
+        return np.repeat(fp, len(x), axis=0)
+
+    left = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, len(xp) - 2)
+    slopes = (fp[1:] - fp[:-1]) / (xp[1:] - xp[:-1])[:, None, None]
+    result = slopes[left] * (x - xp[left])[:, None, None] + fp[left]
+
+    result[x <= xp[0]] = fp[0]
+    result[x >= xp[-1]] = fp[-1]
+    exact = x == xp[left]
+    result[exact] = fp[left[exact]]
+    return result
+
+
+def batch_linear_interpolation(
+    all_frames: List[int],
+    frames_with_figures: np.ndarray,
+    figures: np.ndarray,
+    mask: np.ndarray,
+) -> np.ndarray:
+    """Interpolate figures of several objects at once.
+
+    Every object is interpolated as in `linear_interpolation`, using only
+    its own figures selected by `mask`.
+
+    Args:
+        all_frames (List[int]): The frames at which to evaluate the interpolated values.
+        frames_with_figures (np.ndarray): frames indices of the figures with (o, k) shape,
+            increasing for the masked elements of every row.
+        figures (np.ndarray): figures points with (o, k, n, 2) shape.
+        mask (np.ndarray): boolean (o, k) mask of the existing figures,
+            every row must start with at least one `True` followed by `False` only.
+
+    Returns:
+        np.ndarray: interpolated points with (o, len(all_frames), n, 2) shape.
+    """
+    x = np.asarray(all_frames, dtype=np.float64)
+    fp = np.asarray(figures, dtype=np.float64)
+    counts = mask.sum(axis=1)
+    objects = np.arange(len(counts))
+    last = counts - 1
+
+    # pad every row with its last frame, then shift rows apart to search all rows at once
+    xp = np.where(mask, frames_with_figures, frames_with_figures[objects, last][:, None])
+    xp = xp.astype(np.float64)
+    span = max(xp.max(), x.max()) - min(xp.min(), x.min()) + 1
+    offsets = objects * span
+    found = np.searchsorted((xp + offsets[:, None]).ravel(), (x[None, :] + offsets[:, None]).ravel(), side="right")
+    found = found.reshape(len(objects), len(x)) - 1 - (objects * xp.shape[1])[:, None]
+
+    left = np.clip(found, 0, np.maximum(last - 1, 0)[:, None])
+    right = np.minimum(left + 1, last[:, None])
+    rows = objects[:, None]
+
+    x0, x1 = xp[rows, left], xp[rows, right]
+    f0, f1 = fp[rows, left], fp[rows, right]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = (f1 - f0) / (x1 - x0)[..., None, None]
+    result = slopes * (x[None, :] - x0)[..., None, None] + f0
+
+    first_fp = fp[objects, 0][:, None]
+    last_fp = fp[objects, last][:, None]
+    before = x[None, :] <= xp[:, :1]
+    after = x[None, :] >= xp[objects, last][:, None]
+    exact = x[None, :] == x0
+
+    result = np.where(exact[..., None, None], f0, result)
+    result = np.where(before[..., None, None], first_fp, result)
+    result = np.where(after[..., None, None], last_fp, result)
+    return result
+
+
+def bracketing_keyframes(frames: List[int], start: int, end: int) -> Tuple[int, int]:
+    """Find the keyframes needed to interpolate the frames from `start` to `end`.
+
+    Args:
+        frames (List[int]): increasing frames indices of the keyframes.
+        start (int): first frame to interpolate.
+        end (int): last frame to interpolate.
+
+    Returns:
+        Tuple[int, int]: indices of the last keyframe on or before `start` and
+            of the first keyframe on or after `end`, clipped to the keyframes.
+    """
+    first = int(np.searchsorted(frames, start, side="right")) - 1
+    last = int(np.searchsorted(frames, end, side="left"))
+    return max(first, 0), min(last, len(frames) - 1)
+
+
 def min_dist(obj: np.ndarray) -> float:
     """Calculate min length of edge.
 
@@ -26,22 +137,42 @@ def rm_points(obj: np.ndarray, min_d: float, new_per_side: int) -> np.ndarray:
     Returns:
         np.ndarray: polygon without deleted edges (points).
     """
-    vp = obj[0]
-    new_obj = [vp]
-    point_idx = 0
+    return obj[rm_points_mask(obj[None], min_d, new_per_side)[0]]
+
+
+def rm_points_mask(objs: np.ndarray, min_d: float, new_per_side: int) -> np.ndarray:
+    """Find points to keep in `rm_points` for a stack of polygons at once.
+
+    Every `new_per_side + 1`-th point is always kept, so the polygon is split into
+    independent blocks, which are processed together for all polygons.
+    The loop goes only through `new_per_side` positions inside the block.
+
+    Args:
+        objs (np.ndarray): polygons points with (k, n, 2) shape.
+        min_d (float): minimum edge length.
+        new_per_side (int): 0 and every `new_per_side + 1` dots will not be removed.
+
+    Returns:
+        np.ndarray: boolean (k, n) mask of points to keep.
+    """
+    objs_count, points_count = objs.shape[:2]
+    period = new_per_side + 1
+    blocks = -(-points_count // period)
 
-    for vn in obj[1:]:
-        point_idx += 1
-        d = np.linalg.norm(vn - vp)
-        if d < min_d and point_idx <= new_per_side:
-            continue
-        new_obj.append(vn)
-        vp = vn
+    padded = np.full((objs_count, blocks * period, 2), np.nan)
+    padded[:, :points_count] = objs
+    padded = padded.reshape(objs_count, blocks, period, 2)
 
-        if point_idx > new_per_side:
-            point_idx = 0
+    keep = np.ones((objs_count, blocks, period), dtype=bool)
+    last_kept = padded[:, :, 0]
 
-    return np.array(new_obj)
+    for pos in range(1, period):
+        point = padded[:, :, pos]
+        skip = np.linalg.norm(point - last_kept, axis=-1) < min_d
+        keep[:, :, pos] = ~skip
+        last_kept = np.where(skip[..., None], last_kept, point)
+
+    return keep.reshape(objs_count, -1)[:, :points_count]
 
 
 def obj_order_sign(obj: List[List[float]]) -> int:
@@ -74,11 +205,50 @@ def obj_order_sign(obj: List[List[float]]) -> int:
     return np.sign(np.cross(vec1, vec2)[-1])
 
 
+def cyclic_shift_costs(obj1: np.ndarray, obj2: np.ndarray, chunk_size: int = 2**16) -> np.ndarray:
+    """Total distance between matching points for every circular shift of `obj1`.
+
+    Shifted polygons are sliding windows over the doubled `obj1`, they are
+    compared with `obj2` in chunks of about `chunk_size` points, so the memory
+    stays bounded for big polygons.
+
+    Args:
+        obj1 (np.ndarray): polygon points with (n, 2) shape.
+        obj2 (np.ndarray): polygon points with (n, 2) shape.
+        chunk_size (int): number of points compared at once.
+
+    Returns:
+        np.ndarray: `costs[i]` is the sum of distances between `np.roll(obj1, -i)` and `obj2`.
+    """
+    obj1 = np.asarray(obj1, dtype=np.float64)
+    obj2 = np.asarray(obj2, dtype=np.float64)
+    n = len(obj1)
+    xs = sliding_window_view(np.concatenate((obj1[:, 0], obj1[:, 0])), n)
+    ys = sliding_window_view(np.concatenate((obj1[:, 1], obj1[:, 1])), n)
+
+    costs = np.empty(n)
+    step = max(1, chunk_size // n)
+    for start in range(0, n, step):
+        end = min(start + step, n)
+        dx = xs[start:end] - obj2[:, 0]
+        dy = ys[start:end] - obj2[:, 1]
+        # same operations as `np.linalg.norm(..., axis=1)`, so the costs are equal to its
+        dx *= dx
+        dy *= dy
+        dx += dy
+        np.sqrt(dx, out=dx)
+        costs[start:end] = dx.sum(axis=1)
+    return costs
+
+
 def sort_for_interpolation(obj1: np.ndarray, obj2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """Sorts (shift) circularly to minimize total distances between matching points.
         The number of polygon points must be the same for `obj1` and `obj2`
         and have equal order sign.
 
+        Total distances of all shifts are computed at once with `cyclic_shift_costs`,
+        the first shift with the least one is taken.
+
     Args:
         obj1 (np.ndarray): polygon points in clockwise or anticlockwise order.
         obj2 (np.ndarray): polygon points in clockwise or anticlockwise order.
@@ -88,16 +258,11 @@ def sort_for_interpolation(obj1: np.ndarray, obj2: np.ndarray) -> Tuple[np.ndarr
     """
     if obj1.shape[0] != obj2.shape[0]:
         raise ValueError("Can sort only polygons with same number of vertices.")
+    if len(obj1) == 0:
+        return obj1, obj2
 
-    min_d = np.inf
-    shift = 0
-    for i in range(len(obj1)):
-        d = np.sum(np.linalg.norm(np.roll(obj1, -i, axis=0) - obj2, axis=1))
-        if min_d > d:
-            shift = -i
-            min_d = d
-
-    return np.roll(obj1, shift, axis=0), obj2
+    shift = int(np.argmin(cyclic_shift_costs(obj1, obj2)))
+    return np.roll(obj1, -shift, axis=0), obj2
 
 
 def add_points_to_obj(obj: np.ndarray, total_points: int) -> np.ndarray:
@@ -120,20 +285,70 @@ def add_points_to_obj(obj: np.ndarray, total_points: int) -> np.ndarray:
         raise ValueError("You can only add the same number of points on each edge.")
 
     per_edge = total_points // len(obj)
-    start_point = list(obj[0])
-    new_obj = [start_point]
+    steps = np.arange(per_edge + 1)
+    deltas = (np.roll(obj, -1, axis=0) - obj) / (per_edge + 1)
+    new_obj = obj[:, None, :] + steps[None, :, None] * deltas[:, None, :]
+    return new_obj.reshape(-1, 2)
+
+
+def edge_points(point: np.ndarray, next_point: np.ndarray, num: int) -> np.ndarray:
+    """Create `num` points uniformly distributed between `point` and `next_point`.
 
-    for point in list(np.roll(obj, -1, axis=0)):
-        dx = (point[0] - start_point[0]) / (per_edge + 1)
-        dy = (point[1] - start_point[1]) / (per_edge + 1)
-        for step in range(1, per_edge + 1):
-            nx = start_point[0] + step * dx
-            ny = start_point[1] + step * dy
-            new_obj.append([nx, ny])
-        new_obj.append(point)
-        start_point = point
+    Args:
+        point (np.ndarray): edge start point.
+        next_point (np.ndarray): edge end point.
+        num (int): number of points to create.
+
+    Returns:
+        np.ndarray: new points with (num, 2) shape, both edge ends are not included.
+    """
+    point = np.asarray(point)
+    delta = (np.asarray(next_point) - point) / (num + 1)
+    return point + np.arange(1, num + 1)[:, None] * delta
 
-    return np.array(new_obj[:-1])
+
+def resample_obj(obj: np.ndarray, total_points: int) -> np.ndarray:
+    """Resample polygon to `total_points` points by arc length.
+
+    If `total_points` is not less than the number of polygon points, all points
+    are kept and new ones are distributed between edges proportionally to edge length.
+    Otherwise `total_points` points are placed uniformly along the contour.
+
+    Args:
+        obj (np.ndarray): polygon points in clockwise or anticlockwise order.
+        total_points (int): number of points in the result polygon.
+
+    Returns:
+        np.ndarray: polygon with `total_points` points in the same order.
+    """
+    obj = np.asarray(obj, dtype=np.float64)
+    next_obj = np.roll(obj, -1, axis=0)
+    lengths = np.linalg.norm(next_obj - obj, axis=1)
+    perimeter = lengths.sum()
+
+    if total_points < len(obj):
+        cum_lengths = np.concatenate(([0], np.cumsum(lengths)))
+        positions = np.arange(total_points) * perimeter / total_points
+        edges = np.clip(np.searchsorted(cum_lengths, positions, side="right") - 1, 0, len(obj) - 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.nan_to_num((positions - cum_lengths[edges]) / lengths[edges])
+        return obj[edges] + t[:, None] * (next_obj[edges] - obj[edges])
+
+    new_points = total_points - len(obj)
+    if new_points == 0 or perimeter == 0:
+        return np.concatenate([obj, np.repeat(obj[:1], new_points, axis=0)])
+
+    # largest remainder method to split new points between edges
+    quotas = lengths / perimeter * new_points
+    per_edge = np.floor(quotas).astype(int)
+    rest = new_points - per_edge.sum()
+    per_edge[np.argsort(per_edge - quotas, kind="stable")[:rest]] += 1
+
+    # every edge is represented by its start point and `per_edge` new points
+    edges = np.repeat(np.arange(len(obj)), per_edge + 1)
+    steps = np.arange(len(edges)) - np.repeat(np.cumsum(per_edge + 1) - per_edge - 1, per_edge + 1)
+    t = steps / (per_edge[edges] + 1)
+    return obj[edges] + t[:, None] * (next_obj[edges] - obj[edges])
 
 
 def obj_bbox(obj: np.ndarray):
@@ -171,44 +386,43 @@ def polygon_match(small_obj: np.ndarray, big_obj: np.ndarray):
     small_shifted, big_shifted = shift_and_resize(small_obj, big_obj)
     sim_mat = cosin_sim_matrix(small_shifted, big_shifted)
 
-    mins = []
-    start_i = None
-    used = []
+    # Matches are monotone in circular order: every next point of `small_obj`
+    # can be matched only to the points of `big_obj` from the previous match
+    # up to the first match (exclusive), or to any point while they coincide.
+    start_i = int(np.argmin(sim_mat[0]))
+    mins = [start_i]
+    prev_i = start_i
 
-    for vec in sim_mat:
-        min_i = np.argmin(vec)
-        mins.append(min_i)
-        if start_i is None:
-            start_i = min_i
+    for vec in sim_mat[1:]:
+        if prev_i < start_i:
+            min_i = prev_i + int(np.argmin(vec[prev_i:start_i]))
         else:
-            if start_i > min_i:
-                used = list(range(min_i))
-                used.extend(list(range(start_i, len(big_obj))))
-            else:
-                used = list(range(start_i, min_i))
-        sim_mat[:, used] = np.inf
+            min_i = _first_argmin(vec[:start_i], vec[prev_i:], prev_i)
+        mins.append(min_i)
+        prev_i = min_i
 
     return {i: min_i for i, min_i in enumerate(mins)}
 
 
+def _first_argmin(head: np.ndarray, tail: np.ndarray, tail_start: int) -> int:
+    """`np.argmin` of `vec` where only `head = vec[:k]` and `tail = vec[tail_start:]` are allowed."""
+    tail_i = tail_start + int(np.argmin(tail))
+    if len(head) == 0:
+        return tail_i
+
+    head_i = int(np.argmin(head))
+    head_min, tail_min = head[head_i], tail[tail_i - tail_start]
+    if np.isnan(head_min) or (not np.isnan(tail_min) and head_min <= tail_min):
+        return head_i
+    return tail_i
+
+
 def add_points_to_obj_greedily(obj1: np.ndarray, obj2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     def calc_diff(prev, next, maxl):
         if prev > next:
             return maxl - prev + next
         return next - prev
 
-    def uniform_points(point, next_point, num):
-        dx = (next_point[0] - point[0]) / (num + 1)
-        dy = (next_point[1] - point[1]) / (num + 1)
-        points = []
-
-        for i in range(1, num + 1):
-            nx = point[0] + dx * i
-            ny = point[1] + dy * i
-            points.append([nx, ny])
-        
-        return points
-
     if len(obj1) > len(obj2):
         small_obj = obj2
         big_obj = obj1
@@ -253,13 +467,13 @@ def add_points_to_obj_greedily(obj1: np.ndarray, obj2: np.ndarray) -> Tuple[np.n
                 num += 1
                 r = (r + 1) % len(match_dct)
 
-            newpoints = uniform_points(big_obj[bl], big_obj[(bl + 1) % len(big_obj)], num)
+            newpoints = edge_points(big_obj[bl], big_obj[(bl + 1) % len(big_obj)], num)
             new_sm_obj.append(small_obj[l])
             new_bg_obj.append(big_obj[bl])
             new_bg_obj.extend(newpoints)
             flag = True
         elif diff > 1:
-            newpoints = uniform_points(small_obj[l], small_obj[r], diff - 1)
+            newpoints = edge_points(small_obj[l], small_obj[r], diff - 1)
             new_sm_obj.append(small_obj[l])
             new_sm_obj.extend(newpoints)
 
@@ -1,17 +1,90 @@
-from collections import namedtuple
 import functools
+import threading
+from collections import namedtuple
 
 import sly_globals as g
 import supervisely_lib as sly
 
-from tracker import InterpolationTracker
-from interpolation import (
-    LinearPolygonInterpolation,
-    LinearRectangleInterpolation,
-    LinearPointInterpolation,
-)
 
-ContextTypes = namedtuple("ContextTypes", ["points", "polygons", "rectangles"])
+TrackerState = namedtuple("TrackerState", ["job", "scheduler"])
+
+# the tracker is imported and created in the background after the start,
+# so the session answers `ping` without waiting for it
+_tracker_state = None
+_tracker_lock = threading.Lock()
+# processes to interpolate pairs of polygon keyframes in, forked in `main()`
+_polygon_pool = None
+
+
+def get_tracker() -> TrackerState:
+    """Create the track job and the scheduler on the first call."""
+    global _tracker_state
+    with _tracker_lock:
+        if _tracker_state is None:
+            _tracker_state = _create_tracker()
+        return _tracker_state
+
+
+def _warm_up() -> None:
+    try:
+        get_tracker()
+    except Exception as e:
+        # the first `track` call tries again and reports the error to the labeling tool
+        sly.logger.error(f"Can't create the tracker: {e!r}", exc_info=True)
+
+
+def start_polygon_processes() -> None:
+    """Fork the polygon interpolation workers while the app has no other threads."""
+    global _polygon_pool
+    if g.polygon_processes < 1:
+        return
+    from tracker import ProcessPool
+
+    try:
+        _polygon_pool = ProcessPool(g.polygon_processes)
+        _polygon_pool.start()
+    except Exception as e:
+        _polygon_pool = None
+        sly.logger.error(
+            f"Can't start polygon processes, polygons are interpolated in the app process: {e!r}",
+            exc_info=True,
+        )
+
+
+def _create_tracker() -> TrackerState:
+    from tracker import TrackJob, TrackSettings, TrackSessions, InterpolationCache, TrackScheduler
+
+    g.prepare_data_dir()
+    # figures created by previous `track` calls, to update only the changed intervals
+    track_sessions = TrackSessions() if g.incremental_tracking else None
+    # interpolated coordinates of the last objects, to skip recomputation on retries
+    interpolation_cache = None
+    if g.cache_size_mb > 0:
+        interpolation_cache = InterpolationCache(g.cache_size_mb * 2**20)
+    track_job = TrackJob(
+        TrackSettings(
+            shape_complexity=g.shape_complexity,
+            points_count=g.points_count,
+            max_points=g.max_points,
+            upload_batch_size=g.upload_batch_size,
+            upload_workers=g.upload_workers,
+            upload_queue_size=g.upload_queue_size,
+            figures_page_size=g.figures_page_size,
+            tracking_workers=g.tracking_workers,
+            progress_interval_sec=g.progress_interval_ms / 1000,
+            validate_json=g.validate_json,
+            api_retries=g.api_retries,
+            api_concurrency=g.api_concurrency,
+            metrics_file=g.metrics_file,
+        ),
+        sessions=track_sessions,
+        cache=interpolation_cache,
+        polygon_executor=_polygon_pool,
+    )
+    # `track` calls of different videos and objects run concurrently,
+    # the calls on the same objects - one after another
+    track_scheduler = TrackScheduler(g.concurrent_jobs)
+    return TrackerState(track_job, track_scheduler)
 
 
 def send_error_data(func):
@@ -21,15 +94,20 @@ def send_error_data(func):
         try:
             value = func(*args, **kwargs)
         except Exception as e:
-            track_id = kwargs["context"]["trackId"]
-            api = kwargs["api"]
-            api.post(
-                "videos.notify-annotation-tool",
-                data={
-                    "type": "videos:tracking-error",
-                    "data": {"trackId": track_id, "error": {"message": repr(e)}},
-                },
-            )
+            sly.logger.error(f"{func.__name__} failed: {e!r}", exc_info=True)
+            try:
+                track_id = kwargs["context"]["trackId"]
+                api = kwargs["api"]
+                api.post(
+                    "videos.notify-annotation-tool",
+                    data={
+                        "type": "videos:tracking-error",
+                        "data": {"trackId": track_id, "error": {"message": repr(e)}},
+                    },
+                )
+            except Exception as notify_error:
+                # an exception in a callback stops the whole session
+                sly.logger.warning(f"Can't send the tracking error: {notify_error!r}")
         return value
 
     return wrapper
@@ -46,75 +124,25 @@ def get_session_info(api: sly.Api, task_id, context, state, app_logger):
 @sly.timeit
 @send_error_data
 def track(api: sly.Api, task_id, context, state, app_logger):
-    app_logger.info("Start interpolation.")
-    devided_context: ContextTypes = parse_context(api, context)
-
-    if devided_context.polygons is not None:
-        app_logger.info("Polygon object detected. Start interpolation process.")
-        model = LinearPolygonInterpolation(g.shape_complexity)
-        tracker = InterpolationTracker(devided_context.polygons, model, api)
-        tracker.track()
-
-    if devided_context.rectangles is not None:
-        app_logger.info("Rectangle object detected. Start interpolation process.")
-        model = LinearRectangleInterpolation()
-        tracker = InterpolationTracker(devided_context.rectangles, model, api)
-        tracker.track()
-
-    if devided_context.points is not None:
-        app_logger.info("Point object detected. Start interpolation process.")
-        model = LinearPointInterpolation()
-        tracker = InterpolationTracker(devided_context.points, model, api)
-        tracker.track()
-
-    tracker.finish_tracking()
-    return
-
-
-def parse_context(api: sly.Api, context) -> ContextTypes:
-    figures = context["figureIds"]
-    points, polygons, rectangles = set(), set(), set()
-
-    points_context = None
-    rectangles_context = None
-    polygons_context = None
-
-    for fig_id in figures:
-        fig = api.video.figure.get_info_by_id(fig_id)
-        geometry = fig.geometry_type
-        oid = fig.object_id
-
-        if geometry == "polygon":
-            polygons.add(oid)
-        elif geometry == "rectangle":
-            rectangles.add(oid)
-        elif geometry == "point":
-            points.add(oid)
-        else:
-            raise ValueError(f"Geometry type {geometry} is not supported by this app.")
-
-    if len(points) > 0:
-        points_context = context.copy()
-        points_context["objectIds"] = list(points)
-
-    if len(rectangles) > 0:
-        rectangles_context = context.copy()
-        rectangles_context["objectIds"] = list(rectangles)
-
-    if len(polygons) > 0:
-        polygons_context = context.copy()
-        polygons_context["objectIds"] = list(polygons)
-
-    return ContextTypes(
-        points=points_context, polygons=polygons_context, rectangles=rectangles_context
+    get_tracker().scheduler.submit(
+        context["videoId"],
+        context.get("objectIds"),
+        functools.partial(run_track, api=api, context=context, app_logger=app_logger),
     )
 
 
+@send_error_data
+def run_track(api: sly.Api, context, app_logger):
+    get_tracker().job.run(context, api, app_logger)
+
+
 def main():
     sly.logger.info(
         "Script arguments",
         extra={"context.teamId": g.team_id, "context.workspaceId": g.workspace_id},
     )
+    start_polygon_processes()
+    threading.Thread(target=_warm_up, name="tracker-init", daemon=True).start()
     g.my_app.run()
 
 
@@ -1,6 +1,7 @@
 import os
 import sys
 import pathlib
+import threading
 from dotenv import load_dotenv
 
 load_dotenv("debug.env")
@@ -17,8 +18,6 @@ my_app = sly.AppService()
 api = my_app.public_api
 task_id = my_app.task_id
 
-sly.fs.clean_dir(my_app.data_dir)  # @TODO: for debug
-
 root_source_path = str(pathlib.Path(os.path.abspath(sys.argv[0])).parents[1])
 sly.logger.info(f"Root source directory: {root_source_path}")
 sys.path.append(root_source_path)
@@ -27,10 +26,40 @@ team_id = int(os.environ["context.teamId"])
 workspace_id = int(os.environ["context.workspaceId"])
 # device = os.environ['modal.state.device']
 shape_complexity = os.environ["modal.state.shapeComplexity"]
+points_count = int(os.environ.get("modal.state.pointsCount", 0))
+max_points = int(os.environ.get("modal.state.maxPoints", 1000))
+upload_batch_size = int(os.environ.get("modal.state.uploadBatchSize", 100))
+upload_workers = int(os.environ.get("modal.state.uploadWorkers", 4))
+upload_queue_size = int(os.environ.get("modal.state.uploadQueueSize", 8))
+figures_page_size = int(os.environ.get("modal.state.figuresPageSize", 1000))
+incremental_tracking = os.environ.get("modal.state.incrementalTracking", "false").lower() == "true"
+tracking_workers = int(os.environ.get("modal.state.trackingWorkers", 1))
+concurrent_jobs = int(os.environ.get("modal.state.concurrentJobs", 4))
+progress_interval_ms = int(os.environ.get("modal.state.progressIntervalMs", 500))
+polygon_processes = int(os.environ.get("modal.state.polygonProcesses", 0))
+cache_size_mb = int(os.environ.get("modal.state.cacheSizeMb", 256))
+validate_json = os.environ.get("modal.state.validateJson", "false").lower() == "true"
+api_retries = int(os.environ.get("modal.state.apiRetries", 5))
+api_concurrency = int(os.environ.get("modal.state.apiConcurrency", 8))
 
 
 local_info_dir = os.path.join(my_app.data_dir, "info")
-sly.fs.mkdir(local_info_dir)
+_data_dir_ready = False
+_data_dir_lock = threading.Lock()
+# append the timers and counters of every `track` call to a json lines file
+export_metrics = os.environ.get("modal.state.exportMetrics", "false").lower() == "true"
+metrics_file = os.path.join(local_info_dir, "metrics.jsonl") if export_metrics else None
+
+
+def prepare_data_dir():
+    """Clean the app data directory and create `local_info_dir`, once.
+    Called before the first `track`, so the session starts without waiting for it."""
+    global _data_dir_ready
+    with _data_dir_lock:
+        if not _data_dir_ready:
+            sly.fs.clean_dir(my_app.data_dir)  # @TODO: for debug
+            sly.fs.mkdir(local_info_dir)
+            _data_dir_ready = True
 
 
 def get_files_paths(src_dir, extensions):
@@ -1 +1,9 @@
 from tracker.tracker import InterpolationTracker
+from tracker.loader import ContextLoader, ContextTypes, TrackTarget
+from tracker.sessions import TrackSessions
+from tracker.cache import InterpolationCache
+from tracker.metrics import TrackMetrics
+from tracker.transport import ApiTransport
+from tracker.job import TrackJob, TrackSettings
+from tracker.scheduler import TrackScheduler
+from tracker.processes import ProcessPool
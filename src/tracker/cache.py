@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterator, List, Optional
+
+import numpy as np
+
+
+class PackedFrames(object):
+    """Interpolated coordinates of consecutive frames in one contiguous array.
+
+    Frames with the same number of points are kept as one (frames, n, 2) array.
+    Otherwise (polygons of different pairs of keyframes, `uniform` mode) the
+    points of all frames are kept in one (n, 2) array, `offsets[i]:offsets[i + 1]`
+    are the points of the `i`-th frame. Frames are returned as views, so the
+    value doesn't hold an array object per frame.
+    """
+
+    __slots__ = ("points", "offsets")
+
+    # array objects and the entry of the cache, not counted by `nbytes` of the arrays
+    overhead_bytes = 512
+
+    def __init__(self, frames: List[np.ndarray]) -> None:
+        sizes = [len(frame_coords) for frame_coords in frames]
+        if len(set(sizes)) < 2:
+            self.points = np.array(frames)
+            self.offsets = None
+        else:
+            self.offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=self.offsets[1:])
+            self.points = np.concatenate(frames)
+
+    @property
+    def nbytes(self) -> int:
+        offsets_bytes = 0 if self.offsets is None else self.offsets.nbytes
+        return self.points.nbytes + offsets_bytes + self.overhead_bytes
+
+    def __len__(self) -> int:
+        return len(self.points) if self.offsets is None else len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self.offsets is None:
+            return iter(self.points)
+        return (
+            self.points[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])
+        )
+
+
+class InterpolationCache(object):
+    """LRU cache of the interpolated coordinates.
+
+    Values are the frames of a run packed to `PackedFrames`, the cache is
+    limited by their total size in bytes: the least recently used values are
+    evicted first, a value bigger than the whole cache is not stored.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        if max_bytes < 1:
+            raise ValueError("Cache size must be positive.")
+
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[PackedFrames]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, frames: List[np.ndarray]) -> None:
+        """Store the coordinates of every frame, they are copied to one array."""
+        frames_bytes = sum(self.frame_bytes(coords) for coords in frames)
+        if frames_bytes + PackedFrames.overhead_bytes > self.max_bytes:
+            return
+        value = PackedFrames(frames)
+
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key).nbytes
+            while self._items and self.size + value.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= evicted.nbytes
+            self._items[key] = value
+            self.size += value.nbytes
+
+    @staticmethod
+    def frame_bytes(coords: np.ndarray) -> int:
+        """Upper bound of the size of one frame in the cache, with its int64 offset."""
+        return coords.nbytes + 8
+
+    def __len__(self) -> int:
+        return len(self._items)
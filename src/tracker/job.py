@@ -0,0 +1,159 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import supervisely_lib as sly
+
+from interpolation import (
+    LinearPolygonInterpolation,
+    LinearRectangleInterpolation,
+    LinearPointInterpolation,
+)
+from interpolation.base import BaseInterpolation
+from tracker.cache import InterpolationCache
+from tracker.loader import ContextLoader, ContextTypes, TrackTarget
+from tracker.metrics import TrackMetrics
+from tracker.sessions import TrackSessions
+from tracker.tracker import InterpolationTracker
+from tracker.transport import ApiTransport
+
+
+@dataclass
+class TrackSettings:
+    shape_complexity: str = "greedily"
+    points_count: int = 0
+    max_points: int = 1000
+    upload_batch_size: int = 100
+    upload_workers: int = 4
+    upload_queue_size: int = 8
+    figures_page_size: int = 1000
+    tracking_workers: int = 1
+    progress_interval_sec: float = 0.5
+    validate_json: bool = False
+    # requests to the api: retries of transient errors and requests at once
+    api_retries: int = 5
+    api_concurrency: int = 8
+    # json lines file to append the metrics of every job to
+    metrics_file: Optional[str] = None
+
+
+class TrackJob(object):
+    """Handles `track` requests.
+
+    Keeps the settings and the state shared between the requests, so a request
+    only needs its context and an api. Doesn't depend on the app globals, so it
+    can be run with any `sly.Api`-like object.
+
+    Every request gets its own `TrackMetrics`, written as one log record
+    when the request is finished. All requests share one `ApiTransport`, so
+    they reuse the connections and back off together when the server throttles.
+    """
+
+    def __init__(
+        self,
+        settings: TrackSettings,
+        sessions: Optional[TrackSessions] = None,
+        cache: Optional[InterpolationCache] = None,
+        polygon_executor: Optional[Executor] = None,
+    ) -> None:
+        self.settings = settings
+        self.sessions = sessions
+        self.cache = cache
+        self.polygon_executor = polygon_executor
+        self.transport = ApiTransport(settings.api_concurrency, retries=settings.api_retries)
+
+    def run(self, context, api: sly.Api, logger=sly.logger) -> List[InterpolationTracker]:
+        metrics = TrackMetrics()
+        succeeded = False
+        try:
+            with metrics.timer("total"):
+                trackers = self._run(context, api, logger, metrics)
+            succeeded = True
+            return trackers
+        finally:
+            self.report(metrics, context, logger, succeeded)
+
+    def report(self, metrics: TrackMetrics, context, logger, succeeded: bool) -> None:
+        job_info = {
+            "trackId": context.get("trackId"),
+            "videoId": context.get("videoId"),
+            "objects": len(context.get("objectIds", [])),
+            "frames": context.get("frames"),
+            "succeeded": succeeded,
+        }
+        metrics.log(logger, **job_info)
+        if self.settings.metrics_file is not None:
+            try:
+                metrics.export(self.settings.metrics_file, **job_info)
+            except OSError as exc:
+                logger.warning(f"Can't export metrics: {exc!r}")
+
+    def _run(self, context, api: sly.Api, logger, metrics: TrackMetrics) -> List[InterpolationTracker]:
+        logger.info("Start interpolation.")
+        with metrics.timer("context"):
+            devided_context: ContextTypes = ContextLoader(
+                context,
+                api,
+                self.settings.figures_page_size,
+                self.sessions,
+                metrics,
+                self.transport,
+            ).split()
+        trackers = []
+
+        if devided_context.polygons is not None:
+            logger.info("Polygon object detected. Start interpolation process.")
+            model = LinearPolygonInterpolation(
+                self.settings.shape_complexity,
+                self.settings.points_count,
+                self.settings.max_points,
+                executor=self.polygon_executor,
+            )
+            trackers.append(self.create_tracker(devided_context.polygons, model, api, metrics))
+            trackers[-1].track()
+
+        # the next geometry types are skipped when the user has stopped tracking
+        if devided_context.rectangles is not None and not self._stopped(trackers):
+            logger.info("Rectangle object detected. Start interpolation process.")
+            model = LinearRectangleInterpolation()
+            trackers.append(self.create_tracker(devided_context.rectangles, model, api, metrics))
+            trackers[-1].track()
+
+        if devided_context.points is not None and not self._stopped(trackers):
+            logger.info("Point object detected. Start interpolation process.")
+            model = LinearPointInterpolation()
+            trackers.append(self.create_tracker(devided_context.points, model, api, metrics))
+            trackers[-1].track()
+
+        trackers[-1].finish_tracking()
+        return trackers
+
+    @staticmethod
+    def _stopped(trackers: List[InterpolationTracker]) -> bool:
+        return any(tracker.stopped for tracker in trackers)
+
+    def create_tracker(
+        self,
+        target: TrackTarget,
+        model: BaseInterpolation,
+        api: sly.Api,
+        metrics: Optional[TrackMetrics] = None,
+    ) -> InterpolationTracker:
+        model.validate_json = self.settings.validate_json
+        model.metrics = metrics
+        return InterpolationTracker(
+            target.context,
+            model,
+            api,
+            target.objects_info,
+            upload_batch_size=self.settings.upload_batch_size,
+            upload_workers=self.settings.upload_workers,
+            upload_queue_size=self.settings.upload_queue_size,
+            sessions=self.sessions,
+            generated_figures=target.generated_figures,
+            cache=self.cache,
+            workers=self.settings.tracking_workers,
+            progress_interval_sec=self.settings.progress_interval_sec,
+            metrics=metrics,
+            transport=self.transport,
+        )
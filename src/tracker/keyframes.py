@@ -0,0 +1,86 @@
+from typing import List
+
+import numpy as np
+from supervisely.geometry.geometry import Geometry
+
+import supervisely_lib as sly
+
+
+class KeyframeStore(object):
+    """Keyframes of a single object.
+
+    Frames are kept in a sorted int32 array and the points of all figures - in
+    one (n, 2) int32 buffer of [row, col] pairs, `offsets[i]:offsets[i + 1]`
+    are the points of the figure on `frames[i]`. Geometry objects are created
+    only when the keyframes are interpolated.
+    """
+
+    __slots__ = ("geometry_type", "frames", "points", "offsets")
+
+    def __init__(
+        self, geometry_type: str, frames: np.ndarray, points: np.ndarray, offsets: np.ndarray
+    ) -> None:
+        self.geometry_type = geometry_type
+        self.frames = frames
+        self.points = points
+        self.offsets = offsets
+
+    @classmethod
+    def from_figures(cls, geometry_type: str, frames: List[int], exteriors: List[list]):
+        """Create the store from figures in json format.
+
+        Args:
+            geometry_type (str): `point`, `rectangle` or `polygon`.
+            frames (List[int]): frame index of every figure.
+            exteriors (List[list]): `points.exterior` of every figure json,
+                a list of [col, row] pairs.
+        """
+        order = sorted(range(len(frames)), key=lambda idx: frames[idx])
+        sizes = [len(exteriors[idx]) for idx in order]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+
+        points = np.zeros((offsets[-1], 2), dtype=np.int32)
+        for idx, start, end in zip(order, offsets[:-1], offsets[1:]):
+            # PointLocation rounds the coordinates the same way
+            points[start:end] = np.rint(np.asarray(exteriors[idx], dtype=np.float64)[:, ::-1])
+        if geometry_type == sly.Rectangle.geometry_name():
+            # corners can be stored in any order, `Rectangle.from_json` sorts them the same way
+            corners = points.reshape(-1, 2, 2)
+            corners.sort(axis=1)
+
+        sorted_frames = np.array([frames[idx] for idx in order], dtype=np.int32)
+        return cls(geometry_type, sorted_frames, points, offsets)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __contains__(self, frame_index: int) -> bool:
+        idx = np.searchsorted(self.frames, frame_index)
+        return idx < len(self.frames) and self.frames[idx] == frame_index
+
+    def figure_points(self, idx: int) -> np.ndarray:
+        """Points of the `idx`-th figure with (n, 2) shape, [row, col] order."""
+        return self.points[self.offsets[idx] : self.offsets[idx + 1]]
+
+    def digest(self, first: int, last: int) -> int:
+        """Digest of the frames and points of the keyframes from `first` to `last` inclusive."""
+        sizes = np.diff(self.offsets[first : last + 2])
+        points = self.points[self.offsets[first] : self.offsets[last + 1]]
+        return hash((self.frames[first : last + 1].tobytes(), sizes.tobytes(), points.tobytes()))
+
+    def figures(self) -> List[Geometry]:
+        """Figures sorted by frame index."""
+        return [self._make_geometry(self.figure_points(idx)) for idx in range(len(self))]
+
+    def _make_geometry(self, points: np.ndarray) -> Geometry:
+        points = points.tolist()
+        if self.geometry_type == sly.Point.geometry_name():
+            (row, col), = points
+            return sly.Point(row=row, col=col)
+        if self.geometry_type == sly.Rectangle.geometry_name():
+            (top, left), (bottom, right) = points
+            return sly.Rectangle(top=top, left=left, bottom=bottom, right=right)
+        if self.geometry_type == sly.Polygon.geometry_name():
+            return sly.Polygon(exterior=points)
+        raise ValueError(f"Geometry type {self.geometry_type} is not supported by this app.")
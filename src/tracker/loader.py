@@ -0,0 +1,242 @@
+import bisect
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import supervisely_lib as sly
+
+from tracker.keyframes import KeyframeStore
+from tracker.metrics import TrackMetrics
+from tracker.sessions import GeneratedFigure, TrackSessions, points_digest
+from tracker.tracker import Direction, InterpolationTracker, frames_range
+from tracker.transport import ApiTransport
+
+
+TrackTarget = namedtuple(
+    "TrackTarget", ["context", "objects_info", "generated_figures"], defaults=(None,)
+)
+ContextTypes = namedtuple("ContextTypes", ["points", "polygons", "rectangles"])
+
+
+class ContextLoader(object):
+    """Loads everything a `track` call needs with one set of requests.
+
+    Dataset id, keyframe lists and figures are fetched once for all selected
+    objects and then split by geometry type, so every `InterpolationTracker`
+    gets its own slice without talking to the server. Figures are read page by
+    page and only the points of the ones inside the objects' frame bounds are
+    kept, in a `KeyframeStore` per object.
+
+    With `sessions` the figures created by previous `track` calls are not
+    keyframes: they are collected to `generated_figures` instead, unless they
+    were edited since then.
+
+    Requests are sent with `transport`, they and the time of every loading
+    stage are recorded to `metrics`.
+    """
+
+    geometry_types = {
+        "point": "points",
+        "polygon": "polygons",
+        "rectangle": "rectangles",
+    }
+
+    def __init__(
+        self,
+        context,
+        api: sly.Api,
+        page_size: int = 1000,
+        sessions: Optional[TrackSessions] = None,
+        metrics: Optional[TrackMetrics] = None,
+        transport: Optional[ApiTransport] = None,
+    ) -> None:
+        self.context = context
+        self.api = api
+        self.page_size = page_size
+        self.sessions = sessions
+        self.metrics = metrics or TrackMetrics()
+        self.transport = transport or ApiTransport()
+        self.generated_figures: Dict[int, Dict[int, Tuple[int, int]]] = defaultdict(dict)
+
+        self.video_id = context["videoId"]
+        self.direction = InterpolationTracker.direction_code[context["direction"]]
+        self.first_index, self.last_index = frames_range(context)
+
+        with self.metrics.timer("context.video_info"):
+            self.dataset_id = self._post("videos.info", {"id": self.video_id}).json()["datasetId"]
+        self.objects_geometry = self._get_objects_geometry(context["figureIds"])
+        self.objects_id = list(self.objects_geometry)
+        self.objects_info = self._match_object_figures_on_frames()
+
+    def split(self) -> ContextTypes:
+        objects_by_type = defaultdict(list)
+        for oid, geometry_type in self.objects_geometry.items():
+            objects_by_type[geometry_type].append(oid)
+
+        targets = {}
+        for geometry_type, field_name in self.geometry_types.items():
+            targets[field_name] = self._make_target(objects_by_type.get(geometry_type))
+
+        return ContextTypes(**targets)
+
+    def _make_target(self, objects_id: Optional[List[int]]) -> Optional[TrackTarget]:
+        if not objects_id:
+            return None
+
+        context = self.context.copy()
+        context["objectIds"] = objects_id
+        context["datasetId"] = self.dataset_id
+        objects_info = {oid: self.objects_info[oid] for oid in objects_id}
+        generated_figures = {oid: self.generated_figures[oid] for oid in objects_id}
+        return TrackTarget(
+            context=context, objects_info=objects_info, generated_figures=generated_figures
+        )
+
+    def _get_objects_geometry(self, figure_ids: List[int]) -> Dict[int, str]:
+        data = {
+            "datasetId": self.dataset_id,
+            "filter": [{"field": "id", "operator": "in", "value": figure_ids}],
+            "fields": ["id", "objectId", "geometryType"],
+        }
+        with self.metrics.timer("context.objects"):
+            pages = self.transport.iter_pages(self.api, "figures.list", data, self.metrics)
+            figures = [figure for content in pages for figure in content["entities"]]
+
+        if len(figures) != len(set(figure_ids)):
+            missing = set(figure_ids) - {fig["id"] for fig in figures}
+            raise ValueError(f"Figures {sorted(missing)} do not exist.")
+
+        objects_geometry = {}
+        for fig in figures:
+            geometry = fig["geometryType"]
+            if geometry not in self.geometry_types:
+                raise ValueError(f"Geometry type {geometry} is not supported by this app.")
+            objects_geometry[fig["objectId"]] = geometry
+
+        return objects_geometry
+
+    def _match_object_figures_on_frames(self) -> Dict[int, KeyframeStore]:
+        object_frames_bounds = self._get_objects_frames_bounds()
+
+        objects_frames = defaultdict(list)
+        objects_exteriors = defaultdict(list)
+        sessions_figures = self._get_sessions_figures()
+        for info in self._iter_figures(self._make_filter()):
+            oid = info["objectId"]
+            left, right = object_frames_bounds[oid]
+            frame = info["meta"]["frame"]
+
+            if frame < left or frame > right:
+                continue
+
+            geometry_type = info["geometryType"]
+            if geometry_type != self.objects_geometry[oid]:
+                raise ValueError(
+                    f"All object's figures must be of the same geometry type: "
+                    f"#{oid}-{self.objects_geometry[oid]}",
+                )
+
+            generated = sessions_figures[oid].get(info["id"])
+            if (
+                generated is not None
+                and generated.frame == frame
+                and generated.points_digest == points_digest(info["geometry"])
+            ):
+                self.generated_figures[oid][frame] = (info["id"], generated.interval_digest)
+                continue
+
+            points = info["geometry"]["points"]
+            if len(points["interior"]) > 0:
+                raise ValueError("Can't interpolate objects with holles.")
+
+            objects_frames[oid].append(frame)
+            objects_exteriors[oid].append(points["exterior"])
+
+        if self.sessions is not None:
+            self._discard_lost_figures(sessions_figures, object_frames_bounds)
+
+        with self.metrics.timer("context.keyframes"):
+            objects_info = {
+                oid: KeyframeStore.from_figures(
+                    self.objects_geometry[oid], objects_frames[oid], objects_exteriors[oid]
+                )
+                for oid in self.objects_id
+            }
+        for keyframes in objects_info.values():
+            self.metrics.count("keyframes", len(keyframes))
+            self.metrics.count("keyframes_vertices", len(keyframes.points))
+        return objects_info
+
+    def _iter_figures(self, data) -> Iterator[dict]:
+        """Read `figures.list` page by page, so only one page is kept in memory."""
+        data = {**data, "sort": "id", "sort_order": "asc", "per_page": self.page_size}
+        pages = self.transport.iter_pages(self.api, "figures.list", data, self.metrics)
+
+        for content in self.metrics.timed(pages, "context.figures"):
+            self.metrics.count("figures_loaded", len(content["entities"]))
+            yield from content["entities"]
+
+    def _discard_lost_figures(
+        self,
+        sessions_figures: Dict[int, Dict[int, GeneratedFigure]],
+        object_frames_bounds: Dict[int, Tuple[int, int]],
+    ) -> None:
+        """Forget the figures which were removed or edited since they were created."""
+        for oid, figures in sessions_figures.items():
+            left, right = object_frames_bounds[oid]
+            kept = {figure_id for figure_id, _ in self.generated_figures[oid].values()}
+            lost = [
+                figure_id
+                for figure_id, generated in figures.items()
+                if left <= generated.frame <= right and figure_id not in kept
+            ]
+            self.sessions.discard(self.video_id, oid, lost)
+
+    def _get_sessions_figures(self) -> Dict[int, Dict[int, GeneratedFigure]]:
+        if self.sessions is None:
+            return defaultdict(dict)
+        return defaultdict(
+            dict, {oid: self.sessions.get(self.video_id, oid) for oid in self.objects_id}
+        )
+
+    def _get_objects_frames_bounds(self) -> Dict[int, Tuple[int, int]]:
+        data = {
+            "videoId": self.video_id,
+            "objectIds": self.objects_id,
+        }
+        with self.metrics.timer("context.frames"):
+            resp = self._post("videos.objects.get-frames", data)
+        bounds = {}
+        for oid, frames in zip(self.objects_id, resp.json()):
+            if self.sessions is not None:
+                # keyframes are searched without the figures created by the tracker
+                generated = set(self.sessions.frames(self.video_id, oid))
+                frames = [frame for frame in frames if frame not in generated] or frames
+            bounds[oid] = self._find_key_frames(frames)
+
+        return bounds
+
+    def _find_key_frames(self, frames: List[int]) -> Tuple[int, int]:
+        sframes = sorted(frames)
+        start_i = bisect.bisect_right(sframes, self.first_index) - 1
+        start_i = max(0, start_i)
+        end_i = bisect.bisect_left(sframes, self.last_index)
+        end_i = min(end_i, len(frames) - 1)
+
+        if self.sessions is not None:
+            # the start figure can be created by the tracker too,
+            # so the bounds are the keyframes around the track range
+            return sframes[start_i], sframes[end_i]
+        if self.direction is Direction.forward:
+            return self.first_index, sframes[end_i]
+        return sframes[start_i], self.last_index
+
+    def _post(self, method: str, data: Dict):
+        return self.transport.post(self.api, method, data, self.metrics)
+
+    def _make_filter(self):
+        filter_fig = {"datasetId": self.dataset_id}
+        filter_fig["filter"] = [
+            {"field": "objectId", "operator": "in", "value": self.objects_id},
+        ]
+        filter_fig["fields"] = ["id", "objectId", "meta", "geometry", "geometryType", "imageId"]
+        return filter_fig
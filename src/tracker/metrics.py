@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator
+
+
+class TrackMetrics(object):
+    """Timers and counters of one `track` call.
+
+    Timers are seconds summed over all calls of a stage, so stages which run
+    in several threads can take longer than the whole call. Counters are
+    plain sums. Can be shared by the threads of the tracker and the uploader.
+    """
+
+    def __init__(self) -> None:
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.timers[stage] += seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def api_call(self, method: str, bytes_sent: int = 0) -> None:
+        """Count a request to `method` and the size of its body."""
+        with self._lock:
+            self.counters["api_calls"] += 1
+            self.counters[f"api_calls.{method}"] += 1
+            self.counters["bytes_sent"] += bytes_sent
+
+    def timed(self, items: Iterable, stage: str) -> Iterator:
+        """Iterate over `items`, the time spent to get every item is added to `stage`.
+        Useful for lazy iterators, which do the work when an item is requested."""
+        items = iter(items)
+        seconds = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - start
+                yield item
+        finally:
+            # also when the iteration is stopped early
+            self.add_time(stage, seconds)
+
+    def as_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                "timers": {stage: round(seconds, 6) for stage, seconds in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def log(self, logger, message: str = "Track job metrics.", **extra) -> None:
+        """Write all timers and counters as one log record."""
+        logger.info(message, extra={**extra, **self.as_dict()})
+
+    def export(self, path: str, **extra) -> None:
+        """Append the metrics to a json lines file."""
+        line = json.dumps({"time": time.time(), **extra, **self.as_dict()})
+        with open(path, "a") as file:
+            file.write(line + "\n")
@@ -0,0 +1,63 @@
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import supervisely_lib as sly
+
+
+class ProcessPool(Executor):
+    """Pool of forked worker processes.
+
+    The workers are forked by `start()`, which has to be called before the app
+    starts any threads: a process forked while other threads hold locks can
+    deadlock on them. For the same reason the pool is not forked again when
+    a worker is killed by the system: the pool is broken from then on, `submit`
+    raises `BrokenProcessPool` and the callers interpolate in the app process.
+    """
+
+    def __init__(self, workers: int, logger=sly.logger) -> None:
+        if workers < 1:
+            raise ValueError("Number of processes must be positive.")
+
+        self.workers = workers
+        self.logger = logger
+        self.broken = False
+
+        self._lock = threading.Lock()
+        # forked, so the workers don't run the app script again
+        self._executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("fork")
+        )
+
+    def start(self) -> None:
+        """Fork all the workers now. `ProcessPoolExecutor` forks them on the first task."""
+        self._executor.submit(int).result()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        if self.broken:
+            raise BrokenProcessPool("Worker process has died, the pool is not forked again.")
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool as exc:
+            self._set_broken(exc)
+            raise
+        future.add_done_callback(self._check_result)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def _check_result(self, future: Future) -> None:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._set_broken(future.exception())
+
+    def _set_broken(self, exc: BaseException) -> None:
+        with self._lock:
+            if self.broken:
+                return
+            self.broken = True
+        self.logger.warning(
+            "Worker process has died, polygons are interpolated in the app process "
+            f"until the app is restarted: {exc!r}"
+        )
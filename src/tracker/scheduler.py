@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import supervisely_lib as sly
+
+
+class ScheduledJob(object):
+    """A job waiting in `TrackScheduler` or running."""
+
+    def __init__(self, video_id: int, object_ids: Optional[Iterable[int]], func: Callable) -> None:
+        self.video_id = video_id
+        # None - the job can touch any object of the video
+        self.object_ids = set(object_ids) if object_ids else None
+        self.func = func
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+    def conflicts(self, other: "ScheduledJob") -> bool:
+        if self.video_id != other.video_id:
+            return False
+        if self.object_ids is None or other.object_ids is None:
+            return True
+        return not self.object_ids.isdisjoint(other.object_ids)
+
+
+class TrackScheduler(object):
+    """Runs track jobs in a pool of `workers` threads.
+
+    Jobs of different videos or objects run concurrently. A job which shares
+    objects with an earlier job waits until it is finished, so the figures of
+    an object are never written by two jobs at once and the jobs of an object
+    run in the order they were submitted.
+    """
+
+    def __init__(self, workers: int = 4, logger=sly.logger) -> None:
+        if workers < 1:
+            raise ValueError("Number of workers must be positive.")
+
+        self.workers = workers
+        self.logger = logger
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="track")
+        self._lock = threading.Lock()
+        # submitted to the executor, queued or running
+        self._active: List[ScheduledJob] = []
+        # blocked by the active jobs or by the earlier blocked ones
+        self._blocked: List[ScheduledJob] = []
+        self._running = 0
+
+    def submit(
+        self, video_id: int, object_ids: Optional[Iterable[int]], func: Callable
+    ) -> Future:
+        """Schedule `func()` for the objects of the video.
+
+        Args:
+            video_id (int): video the job writes to.
+            object_ids (Iterable[int]): objects the job writes to,
+                all objects of the video if empty.
+            func (Callable): the job.
+        Returns:
+            Future: result of `func()`.
+        """
+        job = ScheduledJob(video_id, object_ids, func)
+        with self._lock:
+            if any(job.conflicts(other) for other in self._active + self._blocked):
+                self._blocked.append(job)
+            else:
+                self._start(job)
+            stats = self._stats()
+
+        self.logger.info("Track job is scheduled.", extra={"videoId": video_id, **stats})
+        return job.future
+
+    def stats(self) -> Dict[str, int]:
+        """Number of running jobs and of the jobs waiting for a worker or for other jobs."""
+        with self._lock:
+            return self._stats()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs which are not started yet."""
+        stats = self.stats()
+        return stats["queued"] + stats["blocked"]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _stats(self) -> Dict[str, int]:
+        return {
+            "running": self._running,
+            "queued": len(self._active) - self._running,
+            "blocked": len(self._blocked),
+        }
+
+    def _start(self, job: ScheduledJob) -> None:
+        self._active.append(job)
+        self._executor.submit(self._run, job)
+
+    def _run(self, job: ScheduledJob) -> None:
+        with self._lock:
+            self._running += 1
+        waited = time.monotonic() - job.submitted_at
+        self.logger.info(
+            "Track job is started.", extra={"videoId": job.video_id, "waitedSec": round(waited, 3)}
+        )
+
+        if job.future.set_running_or_notify_cancel():
+            try:
+                job.future.set_result(job.func())
+            except BaseException as exc:
+                self.logger.error(f"Track job failed: {exc!r}", exc_info=True)
+                job.future.set_exception(exc)
+
+        with self._lock:
+            self._running -= 1
+            self._active.remove(job)
+            self._start_unblocked()
+
+    def _start_unblocked(self) -> None:
+        blocked = []
+        for job in self._blocked:
+            # the earlier blocked jobs go first
+            if any(job.conflicts(other) for other in self._active + blocked):
+                blocked.append(job)
+            else:
+                self._start(job)
+        self._blocked = blocked
@@ -0,0 +1,63 @@
+import threading
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+GeneratedFigure = namedtuple("GeneratedFigure", ["frame", "points_digest", "interval_digest"])
+
+
+def points_digest(geometry_json: Dict) -> int:
+    """Digest of the figure points, the same for the uploaded and for the downloaded json."""
+    exterior = geometry_json["points"]["exterior"]
+    return hash(np.asarray(exterior, dtype=np.float64).tobytes())
+
+
+class TrackSessions(object):
+    """Figures created by the tracker, remembered between `track` calls.
+
+    Every figure is stored with the digest of its points and the digest of the
+    keyframes interval it was interpolated in. The next `track` call over the
+    same object can tell its own untouched figures from keyframes, keep the
+    ones whose interval did not change and replace only the stale ones.
+    The registry lives in the app memory, so after a restart all figures
+    are treated as keyframes again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._figures: Dict[Tuple[int, int], Dict[int, GeneratedFigure]] = defaultdict(dict)
+
+    def add(
+        self,
+        video_id: int,
+        object_id: int,
+        figure_id: int,
+        frame: int,
+        points_digest: int,
+        interval_digest: int,
+    ) -> None:
+        with self._lock:
+            self._figures[(video_id, object_id)][figure_id] = GeneratedFigure(
+                frame, points_digest, interval_digest
+            )
+
+    def get(self, video_id: int, object_id: int) -> Dict[int, GeneratedFigure]:
+        """Figures created for the object, by figure id."""
+        with self._lock:
+            return dict(self._figures.get((video_id, object_id), {}))
+
+    def discard(self, video_id: int, object_id: int, figure_ids: Iterable[int]) -> None:
+        with self._lock:
+            figures = self._figures.get((video_id, object_id))
+            if figures is None:
+                return
+            for figure_id in figure_ids:
+                figures.pop(figure_id, None)
+            if not figures:
+                del self._figures[(video_id, object_id)]
+
+    def frames(self, video_id: int, object_id: int) -> List[int]:
+        """Frames of the figures created for the object."""
+        return [figure.frame for figure in self.get(video_id, object_id).values()]
@@ -1,21 +1,32 @@
 import bisect
+import copy
+import functools
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from http import HTTPStatus
-from collections import defaultdict
-from typing import Dict, List, Tuple
-from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+import numpy as np
 from supervisely.geometry.geometry import Geometry
 
 
-from interpolation.base import BaseInterpolation
+from interpolation.base import BaseInterpolation, Output
+from interpolation.utils import bracketing_keyframes
+from tracker.cache import InterpolationCache
+from tracker.keyframes import KeyframeStore
+from tracker.metrics import TrackMetrics
+from tracker.sessions import TrackSessions, points_digest
+from tracker.transport import ApiTransport
+from tracker.uploader import FiguresUploader
 
 import supervisely_lib as sly
 
 
-@dataclass
-class ObjectInfo:
-    frames: List[int] = field(default_factory=list)
-    figures: List[Geometry] = field(default_factory=list)
+# runs - (first, last) keyframes indices of the parts to interpolate,
+# reused - frames with figures from previous calls to keep, stale - figures ids to remove
+ObjectPlan = namedtuple("ObjectPlan", ["runs", "reused", "stale", "digests", "object_params"])
 
 
 class Direction(Enum):
@@ -23,14 +34,42 @@ class Direction(Enum):
     backward: int = 1
 
 
+def frames_range(context) -> Tuple[int, int]:
+    """Return the first and the last frame of the track range."""
+    frame_index = context["frameIndex"]
+    direction = InterpolationTracker.direction_code[context["direction"]]
+    last_or_first = frame_index + (-1) ** (direction.value) * context["frames"]
+    return min(last_or_first, frame_index), max(last_or_first, frame_index)
+
+
 class InterpolationTracker(object):
     direction_code = {
         "forward": Direction.forward,
         "backward": Direction.backward,
     }
-
-    def __init__(self, context, interp_model: BaseInterpolation, api: sly.Api) -> None:
+    # size of the coordinates of the objects interpolated at once, in bytes
+    batch_bytes = 16 * 2**20
+
+    def __init__(
+        self,
+        context,
+        interp_model: BaseInterpolation,
+        api: sly.Api,
+        objects_info: Dict[int, KeyframeStore],
+        upload_batch_size: int = 100,
+        upload_workers: int = 4,
+        upload_queue_size: int = 8,
+        sessions: Optional[TrackSessions] = None,
+        generated_figures: Optional[Dict[int, Dict[int, Tuple[int, int]]]] = None,
+        cache: Optional[InterpolationCache] = None,
+        workers: int = 1,
+        metrics: Optional[TrackMetrics] = None,
+        progress_interval_sec: float = 0.5,
+        transport: Optional[ApiTransport] = None,
+    ) -> None:
         self.interp_model = interp_model
+        self.metrics = metrics or TrackMetrics()
+        self.transport = transport or ApiTransport()
         self.frame_index = context["frameIndex"]
         self.frames_count = context["frames"]
         self.api = api
@@ -41,121 +80,143 @@ class InterpolationTracker(object):
         self.figure_ids = list(context["figureIds"])
         self.direction = self.direction_code[context["direction"]]
 
-        last_or_first = self.frame_index + (-1) ** (self.direction.value) * self.frames_count
-        self.last_index = max(last_or_first, self.frame_index)
-        self.first_index = min(last_or_first, self.frame_index)
+        self.first_index, self.last_index = frames_range(context)
 
         if len(self.objects_id) < len(set(self.objects_id)):
             raise ValueError("Only one figure pre frame can be associated with a single object.")
 
-        self.dataset_id = self.get_dataset_id()
-
-        self.match_object_figures_on_frames()
-
-    def get_dataset_id(self):
-        oid = self.objects_id[0]
-        obj_info = self.api.post("/annotation-objects.info", {"id": oid})
-        return obj_info.json()["datasetId"]
-
-    def match_object_figures_on_frames(self):
-        # request info
-        response = self.api.post("figures.list", data=self._make_filter())
-
-        if response.status_code != HTTPStatus.OK:
-            raise ValueError("Can't get figures info. Contact support.")
-
-        figures_info = response.json()["entities"]
-        object_frames_bounds = self._get_objects_frames_bounds()
-
-        self.objects_info: Dict[int, ObjectInfo] = defaultdict(ObjectInfo)
-        default_geometry = None
-        for info in figures_info:
-            oid = info["objectId"]
-            left, right = object_frames_bounds[oid]
-            frame = info["meta"]["frame"]
-
-            if frame < left or frame > right:
-                continue
-
-            geometry_type = info["geometryType"]
-            if default_geometry is None:
-                default_geometry = geometry_type
+        self.uploader = FiguresUploader(
+            api,
+            self.video_id,
+            self.track_id,
+            batch_size=upload_batch_size,
+            workers=upload_workers,
+            max_pending=upload_queue_size,
+            on_uploaded=self._register_figures if sessions is not None else None,
+            metrics=self.metrics,
+            transport=self.transport,
+        )
+        self.dataset_id = context["datasetId"]
+        self.objects_info = objects_info
+        self.sessions = sessions
+        self.generated_figures = generated_figures or {}
+        self.cache = cache
+        self.workers = workers
+        self.plans: Dict[int, ObjectPlan] = {}
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._check_figures()
 
-            if default_geometry != geometry_type:
-                raise ValueError(
-                    f"All object's figures must be of the same geometry type: #{oid}-{default_geometry}",
-                )
+        # progress is counted in frames, it is sent at most every `progress_interval_sec`
+        # and the user can stop tracking in the middle of an object
+        self.progress_interval_sec = progress_interval_sec
+        self._progress = 0
+        self._progress_total = sum(self._frames_in_range(oid) for oid in self.objects_id) + 1
+        self._notified_at = None
+        self._notified_progress = 0
+        self._notify_lock = threading.Lock()
 
-            geometry = info["geometry"]
-            sly_fig = sly.deserialize_geometry(geometry_type, geometry)
-            self.objects_info[oid].frames.append(frame)
-            self.objects_info[oid].figures.append(sly_fig)
-        self._check_figures()
+    @property
+    def stopped(self) -> bool:
+        """The user has stopped tracking."""
+        return self._stop.is_set()
 
     def track(self):
-        for cur_pos, object_id in enumerate(self.objects_id, start=1):
-            stop = self._track_obj(object_id, cur_pos)
-            if stop:
-                break
+        try:
+            if self.workers > 1 and len(self.objects_id) > 1:
+                self._track_concurrently()
+            else:
+                interpolated = zip(self.objects_id, self._interpolate_objects())
+                for object_id, (all_frames, interpol_geom) in interpolated:
+                    self._upload_obj(object_id, all_frames, interpol_geom)
+                    if self._stop.is_set():
+                        break
+            with self.metrics.timer("upload.wait"):
+                self.uploader.wait()
+        finally:
+            self.uploader.close()
+
+    def _track_concurrently(self):
+        """Track objects in a pool of `workers` threads.
+
+        Every object is interpolated with its own copy of the model. When the user
+        stops tracking the objects which have not been started yet are skipped.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self._upload_obj, object_id, all_frames, interpol_geom)
+                for object_id, (all_frames, interpol_geom) in zip(
+                    self.objects_id, self._interpolate_objects(copy_model=True)
+                )
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                self._stop.set()
+                raise
 
     def finish_tracking(self):
-        self._notify(len(self.objects_id) + 1)
-        self.api.logger.info("Tracking task finished.")
-
-    def _get_objects_frames_bounds(self):
-        resp = self.api.post(
-            "videos.objects.get-frames",
-            {
-                "videoId": self.video_id,
-                "objectIds": self.objects_id,
-            },
+        self._notify(self._progress_total)
+        self.api.logger.info(
+            f"Tracking task finished. Created figures: {self.uploader.uploaded}, "
+            f"kept unchanged: {self.reused}, removed stale: {self.uploader.removed}."
         )
-        bounds = {}
-        for oid, frames in zip(self.objects_id, resp.json()):
-            bounds[oid] = self._find_key_frames(frames)
-
-        return bounds
-
-    def _find_key_frames(self, frames: List[int]) -> Tuple[int, int]:
-        sframes = sorted(frames)
-        if self.direction is Direction.forward:
-            start = self.first_index
-            end_i = bisect.bisect_left(sframes, self.last_index)
-            end_i = min(end_i, len(frames) - 1)
-            end = sframes[end_i]
-        else:
-            end = self.last_index
-            start_i = bisect.bisect_right(sframes, self.first_index) - 1
-            start_i = max(0, start_i)
-            start = sframes[start_i]
-        return start, end
-
-    def _make_filter(self):
-        filter_fig = {"datasetId": self.dataset_id}
-        filter_fig["filter"] = [
-            {"field": "objectId", "operator": "in", "value": self.objects_id},
-        ]
-        filter_fig["fields"] = ["id", "objectId", "meta", "geometry", "geometryType", "imageId"]
-        return filter_fig
 
     def _notify(self, cur_pos: int) -> bool:
         # TODO: normal notification
-        stop = self.api.video.notify_progress(
-            self.track_id,
-            self.video_id,
-            self.first_index,
-            self.last_index,
-            cur_pos,
-            len(self.objects_id) + 1,
-        )
+        data = {
+            "type": "videos:fetch-figures-in-range",
+            "data": {
+                "trackId": self.track_id,
+                "videoId": self.video_id,
+                "frameRange": [self.first_index, self.last_index],
+                "progress": {"current": cur_pos, "total": self._progress_total},
+            },
+        }
+        with self.metrics.timer("notify"):
+            response = self.transport.post(
+                self.api, "videos.notify-annotation-tool", data, self.metrics
+            )
 
-        return stop
+        return response.json()["stopped"]
+
+    def _report_progress(self, frames: int) -> None:
+        """Add processed frames to the progress, notify the labeling tool
+        if `progress_interval_sec` has passed since the last time."""
+        with self._lock:
+            self._progress += frames
+            now = time.monotonic()
+            if (
+                self._notified_at is not None
+                and now - self._notified_at < self.progress_interval_sec
+            ):
+                return
+            self._notified_at = now
+            progress = self._progress
+
+        # sent without `_lock`, so a slow request doesn't block the other objects;
+        # skipped while another progress is being sent, the next one is bigger
+        if not self._notify_lock.acquire(blocking=False):
+            return
+        try:
+            # the progress never goes back
+            if progress > self._notified_progress:
+                self._notified_progress = progress
+                if self._notify(progress):
+                    self._stop.set()
+        finally:
+            self._notify_lock.release()
+
+    def _frames_in_range(self, object_id: int) -> int:
+        frames = self.objects_info[object_id].frames
+        start, end = self._window(int(frames[0]), int(frames[-1]))
+        return max(end - start + 1, 0)
 
     def _check_figures(self):
         for object_id in self.objects_id:
-            frames = self.objects_info[object_id].frames
-
-            if len(frames) < 2:
+            if len(self.objects_info[object_id]) < 2:
                 if self.direction is Direction.forward:
                     msg = (
                         f"Skip interpolation for object #{object_id}: "
@@ -176,37 +237,346 @@ class InterpolationTracker(object):
                 self.api.logger.warning(msg)
                 raise ValueError(msg)
 
-    def _track_obj(self, object_id: int, cur_pos: int) -> bool:
-        frames = self.objects_info[object_id].frames
-        figures = self.objects_info[object_id].figures
+    def _sorted_keyframes(self, object_id: int) -> Tuple[List[int], List[Geometry]]:
+        keyframes = self.objects_info[object_id]
+        with self.metrics.timer("keyframes.figures"):
+            return keyframes.frames.tolist(), keyframes.figures()
+
+    def _plan_object(
+        self, object_id: int, frames: List[int], figures: List[Geometry]
+    ) -> ObjectPlan:
+        """Find the keyframes intervals which have to be interpolated again.
+
+        Without `sessions` all intervals are interpolated. Otherwise the figures
+        created by previous calls are kept if their interval has the same
+        keyframes and settings, and the others in the track range are replaced.
+        """
+        object_params = self.interp_model.object_params(figures)
+        full_plan = ObjectPlan([(0, len(frames) - 1)], set(), [], None, object_params)
+        if self.sessions is None:
+            return full_plan
+
+        settings = (self.interp_model.settings_key(), object_params)
+        keyframes = self.objects_info[object_id]
+        digests = [
+            hash((settings, keyframes.digest(idx, idx + 1))) for idx in range(len(frames) - 1)
+        ]
 
-        sorted_fig_fr = sorted(zip(frames, figures), key=lambda pair: pair[0])
-        sorted_frames = [p[0] for p in sorted_fig_fr]
-        sorted_figures = [p[1] for p in sorted_fig_fr]
+        reused, stale = set(), []
+        reused_in_interval = Counter()
+        for frame, (figure_id, interval_digest) in self.generated_figures.get(object_id, {}).items():
+            if frame < self.first_index or frame > self.last_index:
+                continue
+            idx = bisect.bisect_left(frames, frame)
+            if idx == 0 or idx == len(frames) or frames[idx] == frame:
+                continue
+            if digests[idx - 1] == interval_digest:
+                reused.add(frame)
+                reused_in_interval[idx - 1] += 1
+            else:
+                stale.append(figure_id)
+
+        runs = []
+        for idx in range(len(frames) - 1):
+            start = max(frames[idx] + 1, self.first_index)
+            end = min(frames[idx + 1] - 1, self.last_index)
+            if end - start + 1 <= reused_in_interval[idx]:
+                continue
+            if runs and runs[-1][1] == idx:
+                runs[-1] = (runs[-1][0], idx + 1)
+            else:
+                runs.append((idx, idx + 1))
+
+        return ObjectPlan(runs, reused, stale, digests, object_params)
+
+    def _window(self, start_frame: int, end_frame: int) -> Tuple[int, int]:
+        """Part of the frames from `start_frame` to `end_frame` inside the track range,
+        the first frame is greater than the last one if there are no such frames."""
+        return max(start_frame, self.first_index), min(end_frame, self.last_index)
+
+    def _cache_key(
+        self, object_id: int, plan: ObjectPlan, first: int, last: int, window: Tuple[int, int]
+    ) -> Hashable:
+        keyframes = self.objects_info[object_id]
+        return (
+            object_id,
+            self.interp_model.geometry_type,
+            self.interp_model.settings_key(),
+            plan.object_params,
+            keyframes.digest(first, last),
+            window,
+        )
 
-        start, end = min(frames), max(frames)
-        all_frames = list(range(start, end + 1))
+    def _cached(
+        self, key: Hashable, interpolate: Callable[[], Iterator[np.ndarray]]
+    ) -> Iterator[np.ndarray]:
+        """Take the interpolated coordinates from the cache or interpolate and store them.
+        Nothing is computed until the first item is requested, frames are yielded
+        as soon as they are interpolated."""
+        if self.cache is None:
+            yield from interpolate()
+            return
+
+        coords = self.cache.get(key)
+        self.metrics.count("cache_misses" if coords is None else "cache_hits")
+        if coords is not None:
+            yield from coords
+            return
+        yield from self._stored(key, interpolate())
+
+    def _stored(self, key: Hashable, frames: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+        """Yield the coordinates of `frames`, they are stored to the cache when
+        the run is fully interpolated and fits into the cache."""
+        collected, size = [], 0
+        frame_coords = next(frames, None)
+        while frame_coords is not None:
+            if collected is not None:
+                size += self.cache.frame_bytes(frame_coords)
+                if size > self.cache.max_bytes:
+                    # too big for the cache, don't keep the frames in memory
+                    collected = None
+                else:
+                    collected.append(frame_coords)
+            # one frame ahead: the consumer (`zip` with the frames) doesn't ask
+            # for the item after the last one, so the end is detected here
+            next_coords = next(frames, None)
+            if next_coords is None and collected is not None:
+                self.cache.put(key, collected)
+            yield frame_coords
+            frame_coords = next_coords
+
+    def _interpolate_objects(
+        self, copy_model: bool = False
+    ) -> Iterator[Tuple[List[int], Iterator[Dict]]]:
+        """Interpolated figures of every object, computed lazily.
+
+        Args:
+            copy_model (bool): interpolate every object with a copy of the model,
+                so objects can be iterated concurrently.
+        """
+        if self.interp_model.supports_batch and len(self.objects_id) > 1:
+            for all_frames, coords in self._interpolate_batch():
+                yield all_frames, self._to_json(coords)
+            return
 
-        # TODO: ask about full interpolation
-        # all_frames = list(range(min(frames), max(frames)))
+        for object_id in self.objects_id:
+            sorted_frames, sorted_figures = self._sorted_keyframes(object_id)
+            with self.metrics.timer("plan"):
+                plan = self._plan_object(object_id, sorted_frames, sorted_figures)
+            self.plans[object_id] = plan
+            model = copy.copy(self.interp_model) if copy_model else self.interp_model
+
+            # only the frames inside the track range are interpolated,
+            # with the keyframes around them
+            all_frames, runs_coords = [], []
+            for first, last in plan.runs:
+                start, end = self._window(sorted_frames[first], sorted_frames[last])
+                if start > end:
+                    continue
+                first, last = bracketing_keyframes(sorted_frames, start, end)
+                run_frames = list(range(start, end + 1))
+                run_coords = self._cached(
+                    self._cache_key(object_id, plan, first, last, (start, end)),
+                    functools.partial(
+                        model.interpolate,
+                        sorted_frames[first : last + 1],
+                        sorted_figures[first : last + 1],
+                        run_frames,
+                        output=Output.numpy,
+                        object_params=plan.object_params,
+                    ),
+                )
+                all_frames.extend(run_frames)
+                runs_coords.append(run_coords)
+            yield all_frames, self._to_json(chain.from_iterable(runs_coords))
+
+    def _to_json(self, coords: Iterator[np.ndarray]) -> Iterator[Dict]:
+        """Json of every frame of `coords`. Interpolation is lazy, it is done when
+        the next frame is requested: its time and the time of the json
+        serialisation are recorded to separate stages."""
+        to_json = self.interp_model.converter(Output.json)
+        seconds = 0.0
+        try:
+            for frame_coords in self.metrics.timed(coords, "interpolation"):
+                start = time.perf_counter()
+                geom_json = to_json(frame_coords)
+                seconds += time.perf_counter() - start
+                yield geom_json
+        finally:
+            self.metrics.add_time("serialisation", seconds)
+
+    def _interpolate_batch(self) -> Iterator[Tuple[List[int], Iterator[np.ndarray]]]:
+        keyframes = [self._sorted_keyframes(object_id) for object_id in self.objects_id]
+        for object_id, (obj_frames, obj_figures) in zip(self.objects_id, keyframes):
+            with self.metrics.timer("plan"):
+                self.plans[object_id] = self._plan_object(object_id, obj_frames, obj_figures)
+
+        # only the frames inside the track range, with the keyframes around them
+        windows, brackets = [], []
+        for obj_frames, _ in keyframes:
+            windows.append(self._window(obj_frames[0], obj_frames[-1]))
+            brackets.append(bracketing_keyframes(obj_frames, *windows[-1]))
+
+        keys = [
+            self._cache_key(object_id, self.plans[object_id], first, last, window)
+            for object_id, (first, last), window in zip(self.objects_id, brackets, windows)
+        ]
+        coords = [None] * len(keys)
+        if self.cache is not None:
+            coords = [self.cache.get(key) for key in keys]
+            hits = sum(obj_coords is not None for obj_coords in coords)
+            self.metrics.count("cache_hits", hits)
+            self.metrics.count("cache_misses", len(coords) - hits)
+        for idx, (start, end) in enumerate(windows):
+            if start > end:
+                coords[idx] = []
+
+        # objects which are not in the cache are interpolated together, in groups
+        missing = [idx for idx, obj_coords in enumerate(coords) if obj_coords is None]
+        for group in self._batch_groups(missing, windows):
+            group_coords = self._interpolate_group(group, keyframes, brackets, windows)
+            for idx, obj_coords in zip(group, group_coords):
+                if self.cache is not None:
+                    obj_coords = self._stored(keys[idx], obj_coords)
+                coords[idx] = obj_coords
+
+        for idx, (start, end) in enumerate(windows):
+            # not kept here, so the coordinates are freed when the object is uploaded
+            obj_coords, coords[idx] = coords[idx], None
+            yield list(range(start, end + 1)), iter(obj_coords)
+
+    def _batch_groups(
+        self, indices: List[int], windows: List[Tuple[int, int]]
+    ) -> Iterator[List[int]]:
+        """Split objects (indices of `objects_id`) to groups whose coordinates
+        take at most `batch_bytes` when interpolated at once."""
+        group, group_start, group_end = [], None, None
+        for idx in indices:
+            start, end = windows[idx]
+            if group:
+                start, end = min(start, group_start), max(end, group_end)
+            points = int(self.objects_info[self.objects_id[idx]].offsets[1])
+            # float64 (objects, frames, points, 2) array
+            group_bytes = (len(group) + 1) * (end - start + 1) * points * 2 * 8
+            if group and group_bytes > self.batch_bytes:
+                yield group
+                group, (start, end) = [], windows[idx]
+            group.append(idx)
+            group_start, group_end = start, end
+        if group:
+            yield group
+
+    def _interpolate_group(
+        self,
+        group: List[int],
+        keyframes: List[Tuple[List[int], List[Geometry]]],
+        brackets: List[Tuple[int, int]],
+        windows: List[Tuple[int, int]],
+    ) -> List[Iterator[np.ndarray]]:
+        """Coordinates of the objects of `group` in their windows, interpolated
+        together when the first frame of any of them is requested."""
+        lock = threading.Lock()
+        interpolated = []
+        batch_start = min(windows[idx][0] for idx in group)
+        batch_end = max(windows[idx][1] for idx in group)
+
+        def interpolate() -> List[Iterator[np.ndarray]]:
+            with lock:
+                if not interpolated:
+                    frames, figures = [], []
+                    for idx in group:
+                        (obj_frames, obj_figures), (first, last) = keyframes[idx], brackets[idx]
+                        frames.append(obj_frames[first : last + 1])
+                        figures.append(obj_figures[first : last + 1])
+                    batch_frames = list(range(batch_start, batch_end + 1))
+                    interpolated.extend(
+                        self.interp_model.interpolate_batch(
+                            frames, figures, batch_frames, output=Output.numpy
+                        )
+                    )
+            return interpolated
+
+        def object_coords(pos: int, start: int, end: int) -> Iterator[np.ndarray]:
+            obj_coords = interpolate()[pos]
+            yield from islice(obj_coords, start - batch_start, end - batch_start + 1)
+
+        return [object_coords(pos, *windows[idx]) for pos, idx in enumerate(group)]
+
+    def _upload_obj(
+        self, object_id: int, all_frames: List[int], interpol_geom: Iterator[Dict]
+    ) -> None:
+        if self._stop.is_set():
+            return
+
+        keyframes = self.objects_info[object_id]
+        plan = self.plans[object_id]
+        geometry_type = self.interp_model.geometry_type
+        new_figures = []
+        queued = 0
+        processed = 0
+
+        if plan.stale:
+            self.uploader.remove(plan.stale)
+            self.sessions.discard(self.video_id, object_id, plan.stale)
+        with self._lock:
+            self.reused += len(plan.reused)
+        self.metrics.count("figures_reused", len(plan.reused))
+
+        for frame_index, geom_json in zip(all_frames, interpol_geom):
+            if frame_index > self.last_index:
+                break
 
-        interpol_geom = self.interp_model.interpolate(sorted_frames, sorted_figures, all_frames)
+            processed += 1
+            self._report_progress(1)
+            if self._stop.is_set():
+                break
 
-        for frame_index, geom in zip(all_frames, interpol_geom):
-            if frame_index in frames or frame_index < self.first_index:
+            if (
+                frame_index in keyframes
+                or frame_index in plan.reused
+                or frame_index < self.first_index
+            ):
                 continue
-                
-            if frame_index > self.last_index:
-                break
 
-            self.api.video.figure.create(
+            new_figures.append(
+                self.uploader.make_figure(object_id, frame_index, geom_json, geometry_type)
+            )
+
+            if len(new_figures) == self.uploader.batch_size:
+                self.uploader.submit(new_figures)
+                queued += len(new_figures)
+                new_figures = []
+
+        if self._stop.is_set():
+            # the figures which are not uploaded yet are not needed anymore
+            cancelled = self.uploader.cancel()
+            self.metrics.count("figures_queued", queued)
+            self.metrics.count("figures_cancelled", cancelled)
+            self.api.logger.info(
+                f"Object #{object_id}: tracking stopped, queued {queued} figures, "
+                f"cancelled {cancelled} of them."
+            )
+            return
+
+        self.uploader.submit(new_figures)
+        queued += len(new_figures)
+        self.metrics.count("figures_queued", queued)
+        # frames which were kept from previous calls are not iterated
+        self._report_progress(self._frames_in_range(object_id) - processed)
+        self.api.logger.info(f"Object #{object_id}: queued {queued} figures for upload.")
+
+    def _register_figures(self, figures: List[Dict], figure_ids: List[int]) -> None:
+        """Remember uploaded figures in `sessions`, called by the uploader."""
+        for figure, figure_id in zip(figures, figure_ids):
+            object_id = figure["objectId"]
+            frame = figure["meta"]["frame"]
+            frames = self.objects_info[object_id].frames
+            interval = int(frames.searchsorted(frame)) - 1
+            self.sessions.add(
                 self.video_id,
                 object_id,
-                frame_index,
-                geometry_json=geom.to_json(),
-                geometry_type=geom.geometry_name(),
-                track_id=self.track_id,
+                figure_id,
+                frame,
+                points_digest(figure["geometry"]),
+                self.plans[object_id].digests[interval],
             )
-
-        stop = self._notify(cur_pos)
-        return stop
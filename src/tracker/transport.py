@@ -0,0 +1,235 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+import supervisely_lib as sly
+
+from tracker.metrics import TrackMetrics
+
+
+class AdaptiveLimit(object):
+    """Limit of concurrent requests, adjusted to the server.
+
+    The limit is halved every time the server throttles a request and grows
+    back by one after about `limit` successful requests (AIMD), so the app
+    sends as many requests at once as the server accepts.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1) -> None:
+        if max_limit < min_limit or min_limit < 1:
+            raise ValueError("Concurrency limits must be positive and max_limit >= min_limit.")
+
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self._limit = float(max_limit)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @contextmanager
+    def slot(self):
+        """Wait until the number of requests in flight is below the limit."""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def succeeded(self) -> None:
+        with self._cond:
+            if self._limit < self.max_limit:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                self._cond.notify_all()
+
+    def throttled(self) -> int:
+        """Halve the limit, returns the new one."""
+        with self._cond:
+            self._limit = max(self.min_limit, self._limit / 2)
+            return int(self._limit)
+
+
+class ApiTransport(object):
+    """Sends the requests of the tracker to the Supervisely public api.
+
+    All requests go through one `requests.Session`, so the connections are kept
+    alive and reused by every job and thread, up to `max_concurrency` at once.
+    Connection errors, timeouts and responses with `retry_statuses` are retried
+    `retries` times with exponential backoff and jitter, `Retry-After` of the
+    server is respected. When the server throttles the app (429, 503) the
+    number of concurrent requests is reduced by `AdaptiveLimit`. Other errors
+    are raised at once as `requests.HTTPError` with the server message.
+
+    Requests which are not idempotent (e.g. `figures.bulk.add`) can be handled
+    by the server even if the response is lost, so they are retried only when
+    they were not sent (the connection was not established) or were throttled.
+
+    Objects which are not `sly.Api` (e.g. the fake api of the benchmarks) are
+    called with their own `post`, with the same retries and limits.
+    """
+
+    retry_statuses = {
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+    throttle_statuses = {HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE}
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        retries: int = 5,
+        backoff_sec: float = 0.5,
+        max_backoff_sec: float = 30.0,
+        timeout_sec: float = 60.0,
+    ) -> None:
+        if retries < 0:
+            raise ValueError("Number of retries can't be negative.")
+
+        self.retries = retries
+        self.backoff_sec = backoff_sec
+        self.max_backoff_sec = max_backoff_sec
+        self.timeout_sec = timeout_sec
+        self.limit = AdaptiveLimit(max_concurrency)
+
+        self._session = requests.Session()
+        # retries are done here, with the limit of concurrent requests
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def post(
+        self,
+        api: sly.Api,
+        method: str,
+        data: Dict,
+        metrics: Optional[TrackMetrics] = None,
+        idempotent: bool = True,
+    ) -> requests.Response:
+        """Send a request to the public api `method`.
+
+        Args:
+            api (sly.Api): api with the server address and the token of the user.
+            method (str): api method, e.g. `figures.list`.
+            data (Dict): json body of the request.
+            metrics (TrackMetrics): job metrics to count the requests, bytes and retries to.
+            idempotent (bool): the request can be repeated safely, False for the methods
+                which create entities.
+        Returns:
+            requests.Response: response with status 200.
+        """
+        metrics = metrics or TrackMetrics()
+        if isinstance(api, sly.Api):
+            data = {**data, **api.additional_fields}
+        body = json.dumps(data).encode("utf-8")
+
+        for attempt in range(self.retries + 1):
+            metrics.api_call(method, len(body))
+            delay = None
+            try:
+                with self.limit.slot(), metrics.timer(f"api.{method}"):
+                    response = self._send(api, method, data, body)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if not idempotent and not self._not_sent(exc):
+                    raise
+                error = exc
+            else:
+                status = response.status_code
+                if status == HTTPStatus.OK:
+                    self.limit.succeeded()
+                    return response
+                error = self._http_error(method, response)
+                if status not in self.retry_statuses:
+                    raise error
+                if not idempotent and status not in self.throttle_statuses:
+                    # the server could have handled the request before the error
+                    raise error
+                if status in self.throttle_statuses:
+                    metrics.count("api_throttled")
+                    limit = self.limit.throttled()
+                    api.logger.warning(
+                        f"Server throttles requests, concurrency is reduced to {limit}."
+                    )
+                delay = self._retry_after(response)
+
+            if attempt == self.retries:
+                raise error
+            if delay is None:
+                delay = self._backoff(attempt)
+            metrics.count("api_retries")
+            api.logger.warning(
+                f"Request {method} failed (attempt {attempt + 1}/{self.retries + 1}), "
+                f"retry in {delay:.1f} s: {error}"
+            )
+            time.sleep(delay)
+
+    def iter_pages(
+        self, api: sly.Api, method: str, data: Dict, metrics: Optional[TrackMetrics] = None
+    ) -> Iterator[Dict]:
+        """Request the pages of a list method one by one, yields their json."""
+        page, pages_count = 1, 1
+        while page <= pages_count:
+            content = self.post(api, method, {**data, "page": page}, metrics).json()
+            pages_count = content["pagesCount"]
+            yield content
+            page += 1
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _send(self, api: sly.Api, method: str, data: Dict, body: bytes):
+        if not isinstance(api, sly.Api):
+            return api.post(method, data)
+        return self._session.post(
+            f"{api.server_address}/public/api/v3/{method}",
+            data=body,
+            headers={**api.headers, "Content-Type": "application/json"},
+            timeout=self.timeout_sec,
+        )
+
+    @staticmethod
+    def _not_sent(exc: Exception) -> bool:
+        """The request failed before it was sent to the server."""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        # `requests` wraps the error of urllib3 with the reason of the failure
+        reason = exc.args[0] if exc.args else None
+        reason = getattr(reason, "reason", reason)
+        return isinstance(reason, NewConnectionError)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff_sec, self.backoff_sec * 2**attempt)
+        # jitter, so the requests throttled together are not retried together
+        return random.uniform(delay / 2, delay)
+
+    def _retry_after(self, response) -> Optional[float]:
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return min(self.max_backoff_sec, max(0.0, float(headers["Retry-After"])))
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _http_error(method: str, response) -> requests.HTTPError:
+        message = getattr(response, "text", "")
+        return requests.HTTPError(
+            f"Request {method} failed with status {response.status_code}: {message}",
+            response=response,
+        )
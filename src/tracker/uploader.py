@@ -0,0 +1,153 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import supervisely_lib as sly
+
+from tracker.metrics import TrackMetrics
+from tracker.transport import ApiTransport
+
+
+class FiguresUploader(object):
+    """Uploads interpolated figures with `figures.bulk.add` in fixed-size chunks.
+
+    Chunks are sent by a pool of background writers, so the tracker can compute
+    the next frames while previous ones are uploading. At most `max_pending`
+    chunks are kept in memory: `submit` blocks until a writer is free.
+    Requests are sent with `transport`, every chunk is retried independently,
+    so a transient error costs one chunk instead of the whole object. A chunk
+    is retried only if the server could not have created its figures.
+    `on_uploaded(chunk, figure_ids)` is called by the writer after every
+    uploaded chunk. Requests, their time and the time spent waiting for a free
+    writer are recorded to `metrics`.
+    """
+
+    def __init__(
+        self,
+        api: sly.Api,
+        video_id: int,
+        track_id: int,
+        batch_size: int = 100,
+        workers: int = 4,
+        max_pending: int = 8,
+        on_uploaded: Optional[Callable[[List[Dict], List[int]], None]] = None,
+        metrics: Optional[TrackMetrics] = None,
+        transport: Optional[ApiTransport] = None,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("Upload batch size must be positive.")
+        if workers < 1 or max_pending < 1:
+            raise ValueError("Upload workers and queue size must be positive.")
+
+        self.api = api
+        self.video_id = video_id
+        self.track_id = track_id
+        self.batch_size = batch_size
+        self.on_uploaded = on_uploaded
+        self.metrics = metrics or TrackMetrics()
+        self.transport = transport or ApiTransport()
+        self.uploaded = 0
+        self.removed = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        # queued chunks with their sizes
+        self._futures: List[Tuple[Future, int]] = []
+        self._error = None
+
+    def make_figure(self, object_id: int, frame_index: int, geometry_json: Dict, geometry_type: str):
+        return {
+            "meta": {"frame": frame_index},
+            "objectId": object_id,
+            "geometryType": geometry_type,
+            "geometry": geometry_json,
+            "trackId": self.track_id,
+        }
+
+    def submit(self, figures: List[Dict]) -> None:
+        """Queue figures created by `make_figure` for upload.
+
+        Blocks while the queue is full.
+
+        Args:
+            figures (List[Dict]): figures in `figures.bulk.add` format.
+        """
+        for start in range(0, len(figures), self.batch_size):
+            if self._error is not None:
+                raise self._error
+            with self.metrics.timer("upload.queue_wait"):
+                self._slots.acquire()
+            chunk = figures[start : start + self.batch_size]
+            self._futures.append((self._executor.submit(self._upload_chunk, chunk), len(chunk)))
+
+    def wait(self) -> int:
+        """Wait until all queued figures are uploaded.
+
+        Returns:
+            int: total number of created figures.
+        """
+        futures, self._futures = self._futures, []
+        for future, _ in futures:
+            if not future.cancelled():
+                future.result()
+        if self._error is not None:
+            raise self._error
+        return self.uploaded
+
+    def cancel(self) -> int:
+        """Drop the queued chunks which are not being uploaded yet.
+
+        Returns:
+            int: number of dropped figures.
+        """
+        cancelled = 0
+        with self._lock:
+            for future, chunk_size in self._futures:
+                # `cancel()` is True for the chunks cancelled before too
+                if not future.cancelled() and future.cancel():
+                    # the writer has not taken the slot of this chunk
+                    self._slots.release()
+                    cancelled += chunk_size
+        return cancelled
+
+    def remove(self, figure_ids: List[int]) -> None:
+        """Remove figures with `figures.bulk.remove`, waits for the result.
+
+        Args:
+            figure_ids (List[int]): ids of the figures to remove.
+        """
+        for start in range(0, len(figure_ids), self.batch_size):
+            chunk = figure_ids[start : start + self.batch_size]
+            self._post("figures.bulk.remove", {"figureIds": chunk})
+            self.removed += len(chunk)
+            self.metrics.count("figures_removed", len(chunk))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _upload_chunk(self, chunk: List[Dict]) -> int:
+        try:
+            figure_ids = self._post_chunk(chunk)
+            if self.on_uploaded is not None:
+                self.on_uploaded(chunk, figure_ids)
+        except Exception as exc:
+            self._error = exc
+            raise
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            self.uploaded += len(figure_ids)
+        self.metrics.count("figures_created", len(figure_ids))
+        return len(figure_ids)
+
+    def _post_chunk(self, chunk: List[Dict]) -> List[int]:
+        # not repeated if the server could have created the figures, they would be duplicated
+        response = self._post(
+            "figures.bulk.add", {"entityId": self.video_id, "figures": chunk}, idempotent=False
+        )
+        return [figure["id"] for figure in response.json()]
+
+    def _post(self, method: str, data: Dict, idempotent: bool = True):
+        return self.transport.post(self.api, method, data, self.metrics, idempotent)